@@ -5,16 +5,21 @@ import io
 import json
 import re
 import sqlite3
+import threading
 from pathlib import Path
 from typing import cast
 from urllib.parse import urlparse
 
 import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.chart import BarChart, Reference
 from openpyxl.chart.axis import ChartLines
 from openpyxl.chart.layout import Layout, ManualLayout
+from openpyxl.styles import Alignment, Border, Font, Side
 
 try:
     from scripts.signals.artist_registry import (
@@ -118,6 +123,8 @@ REGION_PREF_NAMES = {
     ]
     for region, pref_codes in REGION_PREF_CODES.items()
 }
+# スコープ（全国 + 都道府県 + 地方）1版ぶんだけメモリに保持する。
+SCOPE_CACHE_MAX_ENTRIES = 1 + len(PREF_CODE_NAME_MAP) + len(REGION_PREF_CODES)
 TIME_SERIES_METRICS = {
     "国内+海外（積み上げ）": "stacked",
     "全体": "total",
@@ -125,26 +132,109 @@ TIME_SERIES_METRICS = {
     "海外": "foreign",
 }
 ANNUAL_METRICS = {"全体": "total", "国内": "jp", "海外": "foreign"}
+STAY_METRIC_COLUMNS = ["total", "jp", "foreign"]
+SCOPE_COLUMNS = ["ym", "pref_code", "pref_name", "foreign", "jp", "total"]
+# 月番号（1-12）から "01"〜"12" を引く表。添字 0 は未使用。
+MONTH_LABELS = np.array([""] + [f"{m:02d}" for m in range(1, 13)], dtype=object)
 CHART_VALUE_MODES = {
     "月次": "monthly",
     "年計推移（表記月起点・直近12か月ローリング）": "rolling12",
 }
+# 時系列グラフの区分表示と積み上げ順、ツールチップ定義（データに依存しないので使い回す）。
+TS_METRIC_LABELS = {"jp": "国内", "foreign": "海外"}
+TS_STACK_ORDER = {"foreign": 0, "jp": 1}
+TS_STACKED_TOOLTIP = [
+    alt.Tooltip("ym:N", title="年月"),
+    alt.Tooltip("metric:N", title="区分"),
+    alt.Tooltip("value:Q", title="値", format=",.0f"),
+    alt.Tooltip("share_label:N", title="シェア"),
+]
+TS_SINGLE_TOOLTIP = TS_STACKED_TOOLTIP[:3]
+YEARLY_COMPARE_BASE_TOOLTIP = [
+    alt.Tooltip("ym:N", title="年月"),
+    alt.Tooltip("year:Q", title="年"),
+    alt.Tooltip("month:Q", title="月"),
+]
+FILENAME_UNSAFE_RE = re.compile(r"[^0-9A-Za-z_-]+")
+EXCEL_HEADER_FONT = Font(bold=True)
+EXCEL_HEADER_BORDER = Border(
+    left=Side(style="thin"),
+    right=Side(style="thin"),
+    top=Side(style="thin"),
+    bottom=Side(style="thin"),
+)
+EXCEL_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+@st.cache_resource(show_spinner=False)
+def get_market_stats_connection_state() -> dict:
+    # スクリプトの再実行をまたいで、共有接続・その data_version・ロックを1組だけ保持する。
+    return {"lock": threading.RLock(), "conn": None, "data_version": None}
+
+
+def get_market_stats_connection(data_version: int) -> sqlite3.Connection:
+    # 全セッションで1本の読み取り専用接続を共有し、キャッシュミスのたびに開き直さない。
+    # SQLite ファイルが差し替えられて data_version が変わったら、古い接続を閉じて開き直す。
+    state = get_market_stats_connection_state()
+    with state["lock"]:
+        if state["conn"] is None or state["data_version"] != data_version:
+            if state["conn"] is not None:
+                state["conn"].close()
+                # ディスク上の旧版のスコープ pickle は max_entries では消えないため、ここで消す。
+                get_scope_dataframe.clear()
+            conn = sqlite3.connect(
+                f"{SQLITE_PATH.as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute("PRAGMA mmap_size = 268435456")
+            state["conn"] = conn
+            state["data_version"] = data_version
+        return state["conn"]
 
 
-@st.cache_data(show_spinner=False)
-def load_data() -> pd.DataFrame:
+def read_market_stats(
+    sql: str, params: tuple = (), data_version: int | None = None
+) -> pd.DataFrame:
+    # 読み取り失敗は例外のまま返す（キャッシュ関数内で「データなし」として保存しないため）。
     if not SQLITE_PATH.exists():
         return pd.DataFrame()
-    try:
-        with sqlite3.connect(str(SQLITE_PATH)) as conn:
-            df = pd.read_sql_query("SELECT * FROM market_stats", conn)
+    if data_version is None:
+        data_version = get_market_stats_data_version()
+    # 接続の取得（差し替え時の close を含む）と読み取りを同じロックで直列化する。
+    with get_market_stats_connection_state()["lock"]:
+        conn = get_market_stats_connection(data_version)
+        df = pd.read_sql_query(sql, conn, params=params)
+    if "pref_code" in df.columns:
         df["pref_code"] = df["pref_code"].astype(str).str.zfill(2)
+    if "ym" in df.columns:
         df["ym"] = df["ym"].astype(str)
-        return df
+    return df
+
+
+def query_market_stats(
+    sql: str, params: tuple = (), data_version: int | None = None
+) -> pd.DataFrame:
+    try:
+        return read_market_stats(sql, params, data_version=data_version)
     except Exception:
         return pd.DataFrame()
 
 
+def get_market_stats_data_version() -> int:
+    # ディスク永続キャッシュのキーに含め、SQLite 更新後に古い結果を返さない。
+    try:
+        return SQLITE_PATH.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+@st.cache_data(show_spinner=False)
+def load_pref_options() -> pd.DataFrame:
+    return query_market_stats(
+        "SELECT DISTINCT pref_code, pref_name FROM market_stats ORDER BY pref_code"
+    )
+
+
 @st.cache_data(show_spinner=False)
 def load_stay_facility_occupancy_data() -> pd.DataFrame:
     if not SQLITE_PATH.exists():
@@ -177,45 +267,124 @@ def load_stay_facility_occupancy_data() -> pd.DataFrame:
     )
     df["occupancy_rate"] = pd.to_numeric(df["occupancy_rate"], errors="coerce")
     df = df.dropna(subset=["occupancy_rate"]).copy()
-    return df.sort_values(["ym", "facility_type"]).reset_index(drop=True)
+    df = df.sort_values(["ym", "facility_type"]).reset_index(drop=True)
+    # 地域区分の絞り込み（pref_code の等値比較）を整数コード比較にする。
+    df = df.astype({"pref_code": "category", "pref_name": "category"})
+    # 年・月・年度は読み込み時に1回だけ付与し、チャート生成ごとに作り直さない。
+    return add_fiscal_year_column(df)
 
 
+@st.cache_data(show_spinner=False)
 def load_meta() -> dict:
     if not META_PATH.exists():
         return {}
-    return json.loads(META_PATH.read_text(encoding="utf-8"))
+    return json.loads(META_PATH.read_bytes())
 
 
 def add_year_month_columns(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
-    out["year"] = out["ym"].str.slice(0, 4).astype(int)
-    out["month"] = out["ym"].str.slice(5, 7).astype(int)
-    out["month_label"] = out["month"].map(lambda m: f"{m:02d}")
+    # 文字列処理は "YYYY-MM" から YYYYMM 整数を作る1回だけにし、年・月は整数演算で得る。
+    # ym_int は範囲絞り込み・並べ替えにも使う（文字列比較を避ける）。
+    if "ym_int" in out.columns:
+        ym_int = out["ym_int"]
+    else:
+        ym_int = pd.to_numeric(out["ym"].str.replace("-", "", regex=False)).astype(
+            "int32"
+        )
+    month = (ym_int % 100).astype("int8")
+    out["month_label"] = MONTH_LABELS[month.to_numpy()]
+    out["year"] = (ym_int // 100).astype("int16")
+    out["month"] = month
+    out["ym_int"] = ym_int
     return out
 
 
-@st.cache_data(show_spinner=False)
+def add_fiscal_year_column(df: pd.DataFrame) -> pd.DataFrame:
+    # 年度は4月始まり（1～3月は前年度）。
+    out = add_year_month_columns(df)
+    out["fiscal_year"] = (out["year"] - (out["month"] < 4)).astype("int16")
+    return out
+
+
+def compact_scope_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    # キャッシュに載せる frame を小さく保つ。人数は整数値なので欠損が無ければ int32 に収める。
+    out = df.astype({"pref_code": "category", "pref_name": "category"})
+    metrics = out[STAY_METRIC_COLUMNS]
+    if metrics.notna().all().all():
+        out[STAY_METRIC_COLUMNS] = metrics.round().astype("int32")
+    return out
+
+
+def empty_scope_dataframe() -> pd.DataFrame:
+    # データなしでも、年・月の付与後と同じ列構成で返す。
+    return add_year_month_columns(pd.DataFrame(columns=SCOPE_COLUMNS))
+
+
+@st.cache_data(
+    show_spinner=False, persist="disk", max_entries=SCOPE_CACHE_MAX_ENTRIES
+)
 def get_scope_dataframe(
-    df: pd.DataFrame, scope_type: str, scope_id: str
+    scope_type: str, scope_id: str, data_version: int
 ) -> pd.DataFrame:
+    # 都道府県の絞り込みと地方の合算は SQLite 側で行い、全件を読み込まない。
+    # プロセス再起動後もディスクキャッシュから復元し、data_version で鮮度を保つ。
+    # 読み取り失敗は例外で抜け、一時的な失敗を「データなし」としてディスクに残さない。
     if scope_type == "pref":
-        out = df[df["pref_code"] == scope_id].copy()
-        return out.sort_values("ym").reset_index(drop=True)
+        out = read_market_stats(
+            'SELECT ym, pref_code, pref_name, "foreign", jp, total '
+            "FROM market_stats WHERE pref_code = ? ORDER BY ym",
+            (scope_id,),
+            data_version=data_version,
+        )
+        if out.empty:
+            return empty_scope_dataframe()
+        return add_year_month_columns(compact_scope_dataframe(out))
 
     pref_codes = REGION_PREF_CODES.get(scope_id, [])
-    work = df[df["pref_code"].isin(pref_codes)].copy()
-    if work.empty:
-        return pd.DataFrame(columns=df.columns)
+    if not pref_codes:
+        return empty_scope_dataframe()
+    placeholders = ", ".join("?" for _ in pref_codes)
+    grouped = read_market_stats(
+        'SELECT ym, SUM("foreign") AS "foreign", SUM(jp) AS jp, SUM(total) AS total '
+        f"FROM market_stats WHERE pref_code IN ({placeholders}) "
+        "GROUP BY ym ORDER BY ym",
+        tuple(pref_codes),
+        data_version=data_version,
+    )
+    if grouped.empty:
+        return empty_scope_dataframe()
 
-    grouped = (
-        work.groupby("ym", as_index=False)[["total", "jp", "foreign"]]
-        .sum()
-        .sort_values("ym")
-    )
     grouped["pref_code"] = scope_id
     grouped["pref_name"] = scope_id
-    grouped = grouped[["ym", "pref_code", "pref_name", "foreign", "jp", "total"]]
-    return grouped.reset_index(drop=True)
+    return add_year_month_columns(compact_scope_dataframe(grouped[SCOPE_COLUMNS]))
+
+
+@st.cache_data(show_spinner=False)
+def get_scope_period_options(
+    scope_type: str, scope_id: str, data_version: int
+) -> tuple[list[str], list[int]]:
+    scope = get_scope_dataframe(scope_type, scope_id, data_version)
+    if scope.empty:
+        return [], []
+    # スコープは年月ごとに1行・年月順なので、ym はそのまま、年は出現順の一意値で昇順になる。
+    ym_list = scope["ym"].tolist()
+    year_options = scope["year"].unique().tolist()
+    return ym_list, year_options
+
+
+@st.cache_data(show_spinner=False)
+def get_scope_chart_year_options(
+    scope_type: str, scope_id: str, data_version: int, chart_value_mode_label: str
+) -> list[int]:
+    # 年計推移は先頭11か月が欠けるので、ローリング後に残る年だけを選択肢にする。
+    # 表のみの表示でもグラフ用データを作らずに年の選択状態を確定できる。
+    _, year_options = get_scope_period_options(scope_type, scope_id, data_version)
+    if CHART_VALUE_MODES.get(chart_value_mode_label, "monthly") != "rolling12":
+        return year_options
+    rolled = apply_rolling_12m(get_scope_dataframe(scope_type, scope_id, data_version))
+    if rolled.empty:
+        return []
+    return rolled["year"].unique().tolist()
 
 
 def ym_to_int(ym: str) -> int:
@@ -226,16 +395,15 @@ def build_ym(year: int, month: int) -> str:
     return f"{year:04d}-{month:02d}"
 
 
-def clamp_ym_to_available_range(ym: str, min_ym: str, max_ym: str) -> tuple[str, bool]:
-    if ym < min_ym:
-        return min_ym, True
-    if ym > max_ym:
-        return max_ym, True
-    return ym, False
+def clamp_ym_code_to_available_range(
+    ym_code: int, min_code: int, max_code: int
+) -> tuple[int, bool]:
+    clamped = min(max(ym_code, min_code), max_code)
+    return clamped, clamped != ym_code
 
 
 def sanitize_for_filename(value: str) -> str:
-    safe = re.sub(r"[^0-9A-Za-z_-]+", "_", value.strip()).strip("_")
+    safe = FILENAME_UNSAFE_RE.sub("_", value.strip()).strip("_")
     if safe:
         return safe
     suffix = hashlib.sha1(value.encode("utf-8")).hexdigest()[:8]
@@ -345,7 +513,8 @@ def normalize_selected_years(
 ) -> list[int]:
     if not available_years:
         return []
-    normalized = sorted({int(y) for y in selected_years if int(y) in available_years})
+    available = set(available_years)
+    normalized = sorted(available.intersection(int(y) for y in selected_years))
     if normalized:
         return normalized
     return available_years[-4:] if len(available_years) > 4 else available_years
@@ -355,14 +524,36 @@ def apply_rolling_12m(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df.copy()
 
-    work = df.sort_values("ym").copy()
-    target_cols = ["total", "jp", "foreign"]
-    for col in target_cols:
-        work[col] = work[col].rolling(window=12, min_periods=12).sum()
-    work = work.dropna(subset=target_cols).copy()
-    for col in target_cols:
-        work[col] = work[col].round().astype("int64")
-    return work.reset_index(drop=True)
+    window = 12
+    work = df.sort_values("ym_int")
+    values = work[STAY_METRIC_COLUMNS]
+    # 12行窓の合計は累積和の差で一括計算する。欠損を含む窓は rolling と同様に除外する。
+    head = np.zeros((1, len(STAY_METRIC_COLUMNS)), dtype=np.int64)
+    if all(pd.api.types.is_integer_dtype(dtype) for dtype in values.dtypes):
+        # compact_scope_dataframe で整数化済みなら欠損は無く、float を経由しない。
+        counts = values.to_numpy(dtype=np.int64)
+        complete = np.ones(max(len(counts) - window + 1, 0), dtype=bool)
+    else:
+        missing = values.isna().to_numpy()
+        counts = np.rint(values.fillna(0).to_numpy(dtype="float64")).astype(np.int64)
+        missing_cs = np.vstack([head, np.cumsum(missing, axis=0, dtype=np.int64)])
+        complete = ~(missing_cs[window:] - missing_cs[:-window]).any(axis=1)
+    sums_cs = np.vstack([head, np.cumsum(counts, axis=0)])
+    sums = sums_cs[window:] - sums_cs[:-window]
+
+    out = work.iloc[window - 1 :][complete].copy()
+    out[STAY_METRIC_COLUMNS] = sums[complete]
+    return out.reset_index(drop=True)
+
+
+def slice_ym_code_range(
+    df: pd.DataFrame, ym_from_code: int, ym_to_code: int
+) -> pd.DataFrame:
+    # ym_int 昇順の frame を二分探索で切り出し、全行の比較マスクを作らない。
+    ym_codes = df["ym_int"].to_numpy()
+    lo = int(np.searchsorted(ym_codes, ym_from_code, side="left"))
+    hi = int(np.searchsorted(ym_codes, ym_to_code, side="right"))
+    return df.iloc[lo:hi]
 
 
 def get_chart_source_dataframes(
@@ -372,28 +563,57 @@ def get_chart_source_dataframes(
     if mode == "rolling12":
         chart_all = apply_rolling_12m(df_scope_all)
     else:
-        chart_all = df_scope_all.sort_values("ym").reset_index(drop=True)
+        # get_scope_dataframe は ORDER BY ym 済みなので並べ替え・コピーは不要。
+        chart_all = df_scope_all
 
-    chart_filtered = chart_all[
-        (chart_all["ym"] >= ym_from) & (chart_all["ym"] <= ym_to)
-    ]
+    chart_filtered = slice_ym_code_range(
+        chart_all, ym_to_int(ym_from), ym_to_int(ym_to)
+    )
     return chart_filtered.reset_index(drop=True), chart_all
 
 
+def dataframe_rows(df: pd.DataFrame) -> list[tuple]:
+    # 列ごとの tolist() で numpy スカラーを Python のネイティブ型へまとめて変換する。
+    return list(zip(*(df.iloc[:, i].tolist() for i in range(df.shape[1]))))
+
+
+def place_row_values(
+    sheet_rows: dict[int, list], row: int, col: int, values: list | tuple
+) -> None:
+    cells = sheet_rows.setdefault(row, [])
+    end = col - 1 + len(values)
+    if len(cells) < end:
+        cells.extend([None] * (end - len(cells)))
+    cells[col - 1 : end] = values
+
+
 def write_helper_table(
-    ws, df: pd.DataFrame, start_row: int, start_col: int = 1
+    sheet_rows: dict[int, list], df: pd.DataFrame, start_row: int, start_col: int = 1
 ) -> tuple[int, int]:
     headers = df.columns.tolist()
-    for j, header in enumerate(headers, start=start_col):
-        ws.cell(row=start_row, column=j, value=header)
-    for i, row in enumerate(df.itertuples(index=False), start=start_row + 1):
-        for j, value in enumerate(row, start=start_col):
-            ws.cell(row=i, column=j, value=value)
+    place_row_values(sheet_rows, start_row, start_col, headers)
+    for i, row in enumerate(dataframe_rows(df), start=start_row + 1):
+        place_row_values(sheet_rows, i, start_col, row)
     end_row = start_row if df.empty else start_row + len(df)
     end_col = start_col + len(headers) - 1
     return end_row, end_col
 
 
+def build_excel_header_cell(ws, value) -> WriteOnlyCell:
+    # pandas.DataFrame.to_excel の見出し書式に合わせる。
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = EXCEL_HEADER_FONT
+    cell.border = EXCEL_HEADER_BORDER
+    cell.alignment = EXCEL_HEADER_ALIGNMENT
+    return cell
+
+
+def append_sheet_rows(ws, sheet_rows: dict[int, list]) -> None:
+    # write-only シートは行の追記しかできないため、空行も含めて先頭から順に流す。
+    for row in range(1, max(sheet_rows, default=0) + 1):
+        ws.append(sheet_rows.get(row, []))
+
+
 def try_set_attr(obj, attr_name: str, value) -> None:
     try:
         setattr(obj, attr_name, value)
@@ -424,8 +644,7 @@ def build_excel_report_bytes(
 
     data_sheet_df = df_table[
         ["ym", "pref_code", "pref_name", "total", "jp", "foreign"]
-    ].copy()
-    data_sheet_df = data_sheet_df.rename(
+    ].rename(
         columns={
             "ym": "年月",
             "pref_code": "地域コード",
@@ -436,19 +655,29 @@ def build_excel_report_bytes(
         }
     )
 
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        data_sheet_df.to_excel(writer, sheet_name="data", index=False)
-        workbook = writer.book
-        charts_ws = workbook.create_sheet("charts")
-
-        charts_ws["A1"] = "Exported charts"
-        helper_col = 30  # AD列付近に補助表を置き、見た目への干渉を避ける
-
-        # Time-series helper and chart
-        ts_base = add_year_month_columns(
-            df_chart_filtered[["ym", "total", "jp", "foreign"]]
-        ).sort_values("ym")
+    workbook = Workbook(write_only=True)
+    data_ws = workbook.create_sheet("data")
+    charts_ws = workbook.create_sheet("charts")
+    charts_rows: dict[int, list] = {}
+
+    data_ws.append(
+        [build_excel_header_cell(data_ws, header) for header in data_sheet_df.columns]
+    )
+    for row in dataframe_rows(data_sheet_df):
+        data_ws.append(row)
+
+    place_row_values(charts_rows, 1, 1, ["Exported charts"])
+    helper_col = 30  # AD列付近に補助表を置き、見た目への干渉を避ける
+
+    # Time-series helper and chart
+    ts_start_row = 2
+    ts_end_row = ts_start_row
+    if df_chart_filtered.empty:
+        place_row_values(charts_rows, 2, 1, ["時系列グラフ: データなし"])
+    else:
+        ts_base = df_chart_filtered.sort_values("ym_int")[
+            ["ym", "total", "jp", "foreign"]
+        ]
         ts_mode = TIME_SERIES_METRICS.get(time_series_label, "stacked")
         if ts_mode == "stacked":
             ts_helper = ts_base[["ym", "jp", "foreign"]].rename(
@@ -463,75 +692,73 @@ def build_excel_report_bytes(
             ts_title = f"時系列（{time_series_label}{rolling_suffix}）"
             ts_grouping = "clustered"
 
-        ts_start_row = 2
         ts_end_row, ts_end_col = write_helper_table(
-            charts_ws, ts_helper, ts_start_row, start_col=helper_col
-        )
-        if not ts_helper.empty:
-            ts_chart = BarChart()
-            ts_chart.type = "col"
-            ts_chart.grouping = ts_grouping
-            assign_axis_ids(ts_chart, 10, 100)
-            if ts_grouping == "stacked":
-                ts_chart.overlap = 100
-            ts_chart.title = ts_title
-            ts_chart.y_axis.title = "延べ宿泊者数"
-            ts_chart.x_axis.title = None
-            ts_chart.legend.position = "r"
-            ts_chart.legend.overlay = False
-            ts_chart.layout = Layout(
-                manualLayout=ManualLayout(x=0.04, y=0.08, w=0.78, h=0.78)
-            )
-            ts_data = Reference(
-                charts_ws,
-                min_col=helper_col + 1,
-                max_col=ts_end_col,
-                min_row=ts_start_row,
-                max_row=ts_end_row,
-            )
-            ts_categories = Reference(
-                charts_ws,
-                min_col=helper_col,
-                min_row=ts_start_row + 1,
-                max_row=ts_end_row,
-            )
-            ts_chart.add_data(ts_data, titles_from_data=True)
-            ts_chart.set_categories(ts_categories)
-            ts_chart.x_axis.delete = False
-            ts_chart.y_axis.delete = False
-            ts_chart.x_axis.tickLblPos = "low"
-            ts_chart.x_axis.tickLblSkip = 3
-            try_set_attr(ts_chart.x_axis, "tickMarkSkip", 3)
-            ts_chart.x_axis.majorTickMark = "out"
-            ts_chart.y_axis.majorTickMark = "out"
-            try_set_attr(ts_chart.y_axis, "numFmt", "#,##0")
-            ts_chart.y_axis.majorGridlines = ChartLines()
-            ts_chart.width = 26
-            ts_chart.height = 11
-            charts_ws.add_chart(ts_chart, "A2")
-        else:
-            charts_ws["A2"] = "時系列グラフ: データなし"
-
-        # Annual comparison helper and chart
-        annual_base = add_year_month_columns(
-            df_chart_all[["ym", "total", "jp", "foreign"]]
-        )
-        available_years = sorted(annual_base["year"].unique().tolist())
-        years_for_chart = normalize_selected_years(annual_years, available_years)
-        annual_col = ANNUAL_METRICS.get(annual_metric_label, "total")
-
+            charts_rows, ts_helper, ts_start_row, start_col=helper_col
+        )
+        ts_chart = BarChart()
+        ts_chart.type = "col"
+        ts_chart.grouping = ts_grouping
+        assign_axis_ids(ts_chart, 10, 100)
+        if ts_grouping == "stacked":
+            ts_chart.overlap = 100
+        ts_chart.title = ts_title
+        ts_chart.y_axis.title = "延べ宿泊者数"
+        ts_chart.x_axis.title = None
+        ts_chart.legend.position = "r"
+        ts_chart.legend.overlay = False
+        ts_chart.layout = Layout(
+            manualLayout=ManualLayout(x=0.04, y=0.08, w=0.78, h=0.78)
+        )
+        ts_data = Reference(
+            charts_ws,
+            min_col=helper_col + 1,
+            max_col=ts_end_col,
+            min_row=ts_start_row,
+            max_row=ts_end_row,
+        )
+        ts_categories = Reference(
+            charts_ws,
+            min_col=helper_col,
+            min_row=ts_start_row + 1,
+            max_row=ts_end_row,
+        )
+        ts_chart.add_data(ts_data, titles_from_data=True)
+        ts_chart.set_categories(ts_categories)
+        ts_chart.x_axis.delete = False
+        ts_chart.y_axis.delete = False
+        ts_chart.x_axis.tickLblPos = "low"
+        ts_chart.x_axis.tickLblSkip = 3
+        try_set_attr(ts_chart.x_axis, "tickMarkSkip", 3)
+        ts_chart.x_axis.majorTickMark = "out"
+        ts_chart.y_axis.majorTickMark = "out"
+        try_set_attr(ts_chart.y_axis, "numFmt", "#,##0")
+        ts_chart.y_axis.majorGridlines = ChartLines()
+        ts_chart.width = 26
+        ts_chart.height = 11
+        charts_ws.add_chart(ts_chart, "A2")
+
+    # Annual comparison helper and chart
+    annual_base = df_chart_all[["ym", "year", "month", "total", "jp", "foreign"]]
+    available_years = sorted(annual_base["year"].unique().tolist())
+    years_for_chart = normalize_selected_years(annual_years, available_years)
+    annual_col = ANNUAL_METRICS.get(annual_metric_label, "total")
+
+    # 年別の補助表は時系列の補助表より下から書く（同じ列で重ならない）。
+    annual_start_row = max(30, ts_end_row + 3)
+    if __debug__:
+        assert annual_start_row > ts_end_row, (
+            "Annual helper table must start below the time-series helper table."
+        )
+    if not years_for_chart:
+        place_row_values(charts_rows, 30, 1, ["年別同月比較グラフ: データなし"])
+    else:
+        # 欠けた年・月は NaN のまま残し、月次のときだけ 0 埋めする（年計推移は空欄にする）。
+        # スコープは年月ごとに1行なので、(月, 年) は一意で集計せずに並べ替えられる。
         annual_pivot = (
             annual_base[annual_base["year"].isin(years_for_chart)]
-            .pivot_table(
-                index="month", columns="year", values=annual_col, aggfunc="sum"
-            )
-            .reindex(range(1, 13))
-        )
-        for y in years_for_chart:
-            if y not in annual_pivot.columns:
-                annual_pivot[y] = float("nan")
-        annual_pivot = (
-            annual_pivot[years_for_chart] if years_for_chart else annual_pivot
+            .set_index(["month", "year"])[annual_col]
+            .unstack("year")
+            .reindex(index=range(1, 13), columns=years_for_chart)
         )
         if not is_rolling:
             annual_pivot = annual_pivot.fillna(0)
@@ -541,118 +768,116 @@ def build_excel_report_bytes(
         )
         annual_helper.columns = ["月"] + [str(y) for y in years_for_chart]
 
-        annual_start_row = max(30, ts_end_row + 3)
         annual_end_row, annual_end_col = write_helper_table(
-            charts_ws, annual_helper, annual_start_row, start_col=helper_col
-        )
-
-        # Guard: overlap regression detector for time-series category column.
-        ts_category_values = [
-            charts_ws.cell(row=r, column=helper_col).value
-            for r in range(ts_start_row + 1, ts_end_row + 1)
-        ]
-        if any(v == "月" for v in ts_category_values):
-            raise RuntimeError(
-                "Helper table overlap detected: time-series categories contain annual header."
-            )
+            charts_rows, annual_helper, annual_start_row, start_col=helper_col
+        )
+
+        annual_chart = BarChart()
+        annual_chart.type = "col"
+        annual_chart.grouping = "clustered"
+        assign_axis_ids(annual_chart, 20, 200)
+        annual_chart.title = f"年別同月比較（{annual_metric_label}{rolling_suffix}）"
+        annual_chart.y_axis.title = "延べ宿泊者数"
+        annual_chart.x_axis.title = None
+        annual_chart.legend.position = "r"
+        annual_chart.legend.overlay = False
+        annual_chart.layout = Layout(
+            manualLayout=ManualLayout(x=0.04, y=0.08, w=0.78, h=0.78)
+        )
+        annual_data = Reference(
+            charts_ws,
+            min_col=helper_col + 1,
+            max_col=annual_end_col,
+            min_row=annual_start_row,
+            max_row=annual_end_row,
+        )
+        annual_categories = Reference(
+            charts_ws,
+            min_col=helper_col,
+            min_row=annual_start_row + 1,
+            max_row=annual_end_row,
+        )
+        annual_chart.add_data(annual_data, titles_from_data=True)
+        annual_chart.set_categories(annual_categories)
+        annual_chart.x_axis.delete = False
+        annual_chart.y_axis.delete = False
+        annual_chart.x_axis.tickLblPos = "low"
+        annual_chart.x_axis.tickLblSkip = 1
+        try_set_attr(annual_chart.x_axis, "tickMarkSkip", 1)
+        annual_chart.x_axis.majorTickMark = "out"
+        annual_chart.y_axis.majorTickMark = "out"
+        try_set_attr(annual_chart.y_axis, "numFmt", "#,##0")
+        annual_chart.y_axis.majorGridlines = ChartLines()
+        annual_chart.width = 26
+        annual_chart.height = 12
+        charts_ws.add_chart(annual_chart, "A30")
+
+    append_sheet_rows(charts_ws, charts_rows)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
 
-        if years_for_chart:
-            annual_chart = BarChart()
-            annual_chart.type = "col"
-            annual_chart.grouping = "clustered"
-            assign_axis_ids(annual_chart, 20, 200)
-            annual_chart.title = (
-                f"年別同月比較（{annual_metric_label}{rolling_suffix}）"
-            )
-            annual_chart.y_axis.title = "延べ宿泊者数"
-            annual_chart.x_axis.title = None
-            annual_chart.legend.position = "r"
-            annual_chart.legend.overlay = False
-            annual_chart.layout = Layout(
-                manualLayout=ManualLayout(x=0.04, y=0.08, w=0.78, h=0.78)
-            )
-            annual_data = Reference(
-                charts_ws,
-                min_col=helper_col + 1,
-                max_col=annual_end_col,
-                min_row=annual_start_row,
-                max_row=annual_end_row,
-            )
-            annual_categories = Reference(
-                charts_ws,
-                min_col=helper_col,
-                min_row=annual_start_row + 1,
-                max_row=annual_end_row,
-            )
-            annual_chart.add_data(annual_data, titles_from_data=True)
-            annual_chart.set_categories(annual_categories)
-            annual_chart.x_axis.delete = False
-            annual_chart.y_axis.delete = False
-            annual_chart.x_axis.tickLblPos = "low"
-            annual_chart.x_axis.tickLblSkip = 1
-            try_set_attr(annual_chart.x_axis, "tickMarkSkip", 1)
-            annual_chart.x_axis.majorTickMark = "out"
-            annual_chart.y_axis.majorTickMark = "out"
-            try_set_attr(annual_chart.y_axis, "numFmt", "#,##0")
-            annual_chart.y_axis.majorGridlines = ChartLines()
-            annual_chart.width = 26
-            annual_chart.height = 12
-            charts_ws.add_chart(annual_chart, "A30")
-        else:
-            charts_ws["A30"] = "年別同月比較グラフ: データなし"
 
-    buffer.seek(0)
-    return buffer.getvalue()
+def format_share_labels(part: pd.Series, total: pd.Series) -> pd.Series:
+    # 行ごとの apply を避け、"NN%"（合計0以下は空文字）をまとめて組み立てる。
+    part_values = part.to_numpy(dtype="float64")
+    total_values = total.to_numpy(dtype="float64")
+    has_total = total_values > 0
+    pct = np.zeros(len(part_values), dtype="int64")
+    pct[has_total] = np.rint(part_values[has_total] / total_values[has_total] * 100)
+    labels = pd.Series(pct, index=part.index).astype(str) + "%"
+    return labels.where(has_total, "")
 
 
 def build_time_series_chart(
     df_filtered: pd.DataFrame, metric_mode: str
 ) -> alt.Chart | alt.LayerChart:
-    work = add_year_month_columns(df_filtered[["ym", "total", "jp", "foreign"]])
-    ym_sort = sorted(work["ym"].unique().tolist())
+    # 年・月は ym から読み取れるので、グラフへ送る列とツールチップには含めない。
+    work = df_filtered[["ym", "total", "jp", "foreign"]]
+    # 呼び出し側は年月順・年月ごとに1行の frame を渡すので、並べ替えずにそのまま使う。
+    ym_sort = work["ym"].tolist()
 
     if TIME_SERIES_METRICS[metric_mode] == "stacked":
-        work["total"] = work["jp"] + work["foreign"]
-        long_df = work.melt(
-            id_vars=["ym", "year", "month", "total"],
-            value_vars=["jp", "foreign"],
-            var_name="metric_key",
-            value_name="value",
-        )
-        metric_labels = {"jp": "国内", "foreign": "海外"}
-        long_df["metric"] = long_df["metric_key"].map(metric_labels)
-        long_df["stack_order"] = long_df["metric_key"].map({"foreign": 0, "jp": 1})
-        long_df["share_label"] = long_df.apply(
-            lambda r: (
-                f"{int(round((r['value'] / r['total']) * 100))}%"
-                if r["total"] > 0
-                else ""
+        # 縦持ち（国内→海外の順）は melt を通さず、列配列の連結で一度に組み立てる。
+        n_rows = len(work)
+        ym_values = work["ym"].to_numpy()
+        jp_values = work["jp"].to_numpy()
+        foreign_values = work["foreign"].to_numpy()
+        total_values = jp_values + foreign_values
+        ym_long = np.concatenate([ym_values, ym_values])
+        total_long = np.concatenate([total_values, total_values])
+        value_long = np.concatenate([jp_values, foreign_values])
+        metric_long = np.repeat(
+            np.array(
+                [TS_METRIC_LABELS["jp"], TS_METRIC_LABELS["foreign"]], dtype=object
             ),
-            axis=1,
+            n_rows,
         )
-
-        label_base = work[["ym", "year", "month", "total", "jp", "foreign"]].copy()
-        jp_label_df = label_base.copy()
-        jp_label_df["metric"] = metric_labels["jp"]
-        jp_label_df["y_center"] = jp_label_df["foreign"] + (jp_label_df["jp"] / 2)
-        jp_label_df["share_label"] = jp_label_df.apply(
-            lambda r: (
-                f"{int(round((r['jp'] / r['total']) * 100))}%" if r["total"] > 0 else ""
-            ),
-            axis=1,
+        share_label_long = format_share_labels(
+            pd.Series(value_long), pd.Series(total_long)
         )
-        foreign_label_df = label_base.copy()
-        foreign_label_df["metric"] = metric_labels["foreign"]
-        foreign_label_df["y_center"] = foreign_label_df["foreign"] / 2
-        foreign_label_df["share_label"] = foreign_label_df.apply(
-            lambda r: (
-                f"{int(round((r['foreign'] / r['total']) * 100))}%"
-                if r["total"] > 0
-                else ""
-            ),
-            axis=1,
+        long_df = pd.DataFrame(
+            {
+                "ym": ym_long,
+                "value": value_long,
+                "metric": metric_long,
+                "stack_order": np.repeat(
+                    np.array([TS_STACK_ORDER["jp"], TS_STACK_ORDER["foreign"]]), n_rows
+                ),
+                "share_label": share_label_long,
+            }
+        )
+        # シェアラベルも同じ並びなので、位置（y_center）だけ求めて配列を使い回す。
+        share_df = pd.DataFrame(
+            {
+                "ym": ym_long,
+                "metric": metric_long,
+                "y_center": np.concatenate(
+                    [foreign_values + jp_values / 2, foreign_values / 2]
+                ),
+                "share_label": share_label_long,
+            }
         )
-        share_df = pd.concat([jp_label_df, foreign_label_df], ignore_index=True)
 
         bars = (
             alt.Chart(long_df)
@@ -667,14 +892,7 @@ def build_time_series_chart(
                     scale=alt.Scale(domain=["国内", "海外"]),
                 ),
                 order=alt.Order("stack_order:Q", sort="ascending"),
-                tooltip=[
-                    alt.Tooltip("ym:N", title="年月"),
-                    alt.Tooltip("year:Q", title="年"),
-                    alt.Tooltip("month:Q", title="月"),
-                    alt.Tooltip("metric:N", title="区分"),
-                    alt.Tooltip("value:Q", title="値", format=",.0f"),
-                    alt.Tooltip("share_label:N", title="シェア"),
-                ],
+                tooltip=TS_STACKED_TOOLTIP,
             )
         )
 
@@ -692,9 +910,11 @@ def build_time_series_chart(
         return bars + share_text
 
     metric_col = TIME_SERIES_METRICS[metric_mode]
-    single_df = work[["ym", "year", "month", metric_col]].copy()
-    single_df = single_df.rename(columns={metric_col: "value"})
-    single_df["metric"] = metric_mode
+    single_df = (
+        work[["ym", metric_col]]
+        .set_axis(["ym", "value"], axis=1)
+        .assign(metric=metric_mode)
+    )
 
     return (
         alt.Chart(single_df)
@@ -703,13 +923,7 @@ def build_time_series_chart(
             x=alt.X("ym:N", title="年月", sort=ym_sort),
             y=alt.Y("value:Q", title="延べ宿泊者数"),
             color=alt.value("#4C78A8"),
-            tooltip=[
-                alt.Tooltip("ym:N", title="年月"),
-                alt.Tooltip("year:Q", title="年"),
-                alt.Tooltip("month:Q", title="月"),
-                alt.Tooltip("metric:N", title="区分"),
-                alt.Tooltip("value:Q", title="値", format=",.0f"),
-            ],
+            tooltip=TS_SINGLE_TOOLTIP,
         )
     )
 
@@ -717,9 +931,12 @@ def build_time_series_chart(
 def build_yearly_month_compare_chart(
     df_scope_all: pd.DataFrame, metric_col: str, selected_years: list[int]
 ) -> alt.Chart:
-    month_sort = [f"{m:02d}" for m in range(1, 13)]
-    work = add_year_month_columns(df_scope_all[["ym", "total", "jp", "foreign"]])
-    work = work[work["year"].isin(selected_years)].copy()
+    month_sort = MONTH_LABELS[1:].tolist()
+    # 表示する指標の1列だけを載せる（他の2指標はエンコードしない）。
+    work = df_scope_all.loc[
+        df_scope_all["year"].isin(selected_years),
+        ["ym", "year", "month", "month_label", metric_col],
+    ]
 
     return (
         alt.Chart(work)
@@ -730,9 +947,7 @@ def build_yearly_month_compare_chart(
             y=alt.Y(f"{metric_col}:Q", title="延べ宿泊者数"),
             color=alt.Color("year:N", title="年", sort=selected_years),
             tooltip=[
-                alt.Tooltip("ym:N", title="年月"),
-                alt.Tooltip("year:Q", title="年"),
-                alt.Tooltip("month:Q", title="月"),
+                *YEARLY_COMPARE_BASE_TOOLTIP,
                 alt.Tooltip(f"{metric_col}:Q", title="値", format=",.0f"),
             ],
         )
@@ -747,8 +962,10 @@ def get_ordered_facility_types(facility_types: list[str]) -> list[str]:
 
 def build_facility_occupancy_timeseries_chart(df_filtered: pd.DataFrame) -> alt.Chart:
     ym_sort = sorted(df_filtered["ym"].astype(str).unique().tolist())
+    # エンコードする列だけを載せる（都道府県や読み込み時に付与した年・月は不要）。
+    chart_df = df_filtered[["ym", "facility_type", "occupancy_rate"]]
     return (
-        alt.Chart(df_filtered)
+        alt.Chart(chart_df)
         .mark_line(point=True)
         .encode(
             x=alt.X("ym:N", title="年月", sort=ym_sort),
@@ -773,23 +990,19 @@ def build_facility_occupancy_fiscal_compare_chart(
     if df.empty:
         return alt.Chart(pd.DataFrame(columns=["fiscal_month_label", "occupancy_rate"]))
 
-    work = add_year_month_columns(df[["ym", "occupancy_rate"]])
-    work["fiscal_year"] = work.apply(
-        lambda r: int(r["year"]) if int(r["month"]) >= 4 else int(r["year"]) - 1,
-        axis=1,
-    )
-    work["fiscal_month"] = work["month"].astype(int)
+    if "fiscal_year" not in df.columns:
+        df = add_fiscal_year_column(df[["ym", "occupancy_rate"]])
     month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-    month_order_labels = [f"{m:02d}" for m in month_order]
-    work["fiscal_month_label"] = work["fiscal_month"].map(lambda m: f"{m:02d}")
-    work = work[work["fiscal_year"].isin(fiscal_years)].copy()
+    month_order_labels = MONTH_LABELS[month_order].tolist()
+    work = df.loc[
+        df["fiscal_year"].isin(fiscal_years),
+        ["fiscal_year", "month_label", "occupancy_rate"],
+    ]
 
     grouped = (
-        work.groupby(["fiscal_year", "fiscal_month_label"], as_index=False)[
-            "occupancy_rate"
-        ]
+        work.groupby(["fiscal_year", "month_label"], as_index=False)["occupancy_rate"]
         .mean()
-        .copy()
+        .rename(columns={"month_label": "fiscal_month_label"})
     )
 
     return (
@@ -825,26 +1038,20 @@ def build_facility_occupancy_fiscal_type_compare_chart(
             )
         )
 
-    work = add_year_month_columns(df[["ym", "facility_type", "occupancy_rate"]])
-    work["fiscal_year"] = work.apply(
-        lambda r: int(r["year"]) if int(r["month"]) >= 4 else int(r["year"]) - 1,
-        axis=1,
-    )
-    work["fiscal_month"] = work["month"].astype(int)
+    if "fiscal_year" not in df.columns:
+        df = add_fiscal_year_column(df[["ym", "facility_type", "occupancy_rate"]])
     month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-    month_order_labels = [f"{m:02d}" for m in month_order]
-    work["fiscal_month_label"] = work["fiscal_month"].map(lambda m: f"{m:02d}")
-    work = work[
-        (work["fiscal_year"] == int(fiscal_year))
-        & (work["facility_type"].isin(facility_types))
-    ].copy()
+    month_order_labels = MONTH_LABELS[month_order].tolist()
+    work = df.loc[
+        (df["fiscal_year"] == int(fiscal_year))
+        & (df["facility_type"].isin(facility_types)),
+        ["facility_type", "month_label", "occupancy_rate"],
+    ]
 
     grouped = (
-        work.groupby(["facility_type", "fiscal_month_label"], as_index=False)[
-            "occupancy_rate"
-        ]
+        work.groupby(["facility_type", "month_label"], as_index=False)["occupancy_rate"]
         .mean()
-        .copy()
+        .rename(columns={"month_label": "fiscal_month_label"})
     )
     grouped["fiscal_year"] = int(fiscal_year)
 
@@ -905,8 +1112,8 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
             .drop_duplicates()
             .sort_values("pref_code")
         )
-        pref_labels = prefs.apply(
-            lambda r: f"{r['pref_code']} {r['pref_name']}", axis=1
+        pref_labels = (
+            prefs["pref_code"].astype(str) + " " + prefs["pref_name"].astype(str)
         ).tolist()
         pref_map = dict(zip(pref_labels, prefs["pref_code"].tolist()))
         with top_col2:
@@ -948,10 +1155,9 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
         st.info("宿泊施設種別を1つ以上選択してください。")
         return
 
-    target_df_all = scope_df[
-        scope_df["facility_type"].isin(selected_facility_types)
-    ].copy()
-    ym_options = sorted(target_df_all["ym"].astype(str).unique().tolist())
+    target_df_all = scope_df[scope_df["facility_type"].isin(selected_facility_types)]
+    # 読み込み時に年月順へ並べてあるので、ym は出現順の一意値がそのまま昇順になる。
+    ym_options = target_df_all["ym"].unique().tolist()
     if not ym_options:
         st.info("選択した条件のデータがありません。")
         return
@@ -960,9 +1166,8 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
     max_ym = ym_options[-1]
     default_ym_from = ym_options[max(0, len(ym_options) - 36)]
     default_ym_to = ym_options[-1]
-    year_options = sorted(
-        target_df_all["ym"].str.slice(0, 4).astype(int).unique().tolist()
-    )
+    # 年は読み込み時に付与した year 列を使い、ym 文字列の切り出しを毎回行わない。
+    year_options = target_df_all["year"].unique().tolist()
     month_options = list(range(1, 13))
 
     def _fmt_month(v: int) -> str:
@@ -1009,15 +1214,21 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
                 key="facility_occ_end_month",
             )
 
-    ym_from = build_ym(start_year, start_month)
-    ym_to = build_ym(end_year, end_month)
-    ym_from, from_clamped = clamp_ym_to_available_range(ym_from, min_ym, max_ym)
-    ym_to, to_clamped = clamp_ym_to_available_range(ym_to, min_ym, max_ym)
+    min_ym_code = ym_to_int(min_ym)
+    max_ym_code = ym_to_int(max_ym)
+    ym_from_code, from_clamped = clamp_ym_code_to_available_range(
+        start_year * 100 + start_month, min_ym_code, max_ym_code
+    )
+    ym_to_code, to_clamped = clamp_ym_code_to_available_range(
+        end_year * 100 + end_month, min_ym_code, max_ym_code
+    )
+    ym_from = build_ym(*divmod(ym_from_code, 100))
+    ym_to = build_ym(*divmod(ym_to_code, 100))
     if from_clamped:
         st.warning(f"開始年月をデータ範囲に合わせて {ym_from} に補正しました。")
     if to_clamped:
         st.warning(f"終了年月をデータ範囲に合わせて {ym_to} に補正しました。")
-    if ym_to_int(ym_from) > ym_to_int(ym_to):
+    if ym_from_code > ym_to_code:
         ym_from, ym_to = ym_to, ym_from
         st.warning(
             f"開始年月と終了年月が逆だったため、{ym_from} ～ {ym_to} に入れ替えました。"
@@ -1059,13 +1270,8 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
         key="facility_occ_fiscal_compare_mode",
     )
 
-    fiscal_all_scope = add_year_month_columns(scope_df[["ym"]].drop_duplicates().copy())
-    fiscal_all_scope["fiscal_year"] = fiscal_all_scope.apply(
-        lambda r: int(r["year"]) if int(r["month"]) >= 4 else int(r["year"]) - 1,
-        axis=1,
-    )
     fiscal_year_options_scope = sorted(
-        fiscal_all_scope["fiscal_year"].astype(int).unique().tolist()
+        scope_df["fiscal_year"].astype(int).unique().tolist()
     )
 
     if fiscal_compare_mode == "年度比較（種別固定）":
@@ -1082,15 +1288,8 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
         fiscal_target_df_all = scope_df[
             scope_df["facility_type"] == fiscal_facility_type
         ].copy()
-        fiscal_all = add_year_month_columns(
-            fiscal_target_df_all[["ym", "occupancy_rate"]]
-        )
-        fiscal_all["fiscal_year"] = fiscal_all.apply(
-            lambda r: int(r["year"]) if int(r["month"]) >= 4 else int(r["year"]) - 1,
-            axis=1,
-        )
         fiscal_year_options = sorted(
-            fiscal_all["fiscal_year"].astype(int).unique().tolist()
+            fiscal_target_df_all["fiscal_year"].astype(int).unique().tolist()
         )
         default_fiscal_years = (
             fiscal_year_options[-4:]
@@ -1138,20 +1337,19 @@ def render_stay_facility_occupancy_view(meta: dict) -> None:
             st.altair_chart(fiscal_chart, use_container_width=True)
 
     st.subheader("表")
-    table_df = ranged_df[
-        ["ym", "pref_code", "pref_name", "facility_type", "occupancy_rate"]
-    ].copy()
-    table_df = table_df.sort_values(["ym", "facility_type"]).reset_index(drop=True)
-    table_df["occupancy_rate"] = table_df["occupancy_rate"].round(1)
-    table_df = table_df.rename(
-        columns={
-            "ym": "年月",
-            "pref_code": "都道府県コード",
-            "pref_name": "都道府県",
-            "facility_type": "宿泊施設種別",
-            "occupancy_rate": "客室稼働率（%）",
-        }
+    table_df = (
+        ranged_df[["ym", "pref_code", "pref_name", "facility_type", "occupancy_rate"]]
+        .sort_values(["ym", "facility_type"])
+        .reset_index(drop=True)
     )
+    table_df["occupancy_rate"] = table_df["occupancy_rate"].round(1)
+    table_df.columns = [
+        "年月",
+        "都道府県コード",
+        "都道府県",
+        "宿泊施設種別",
+        "客室稼働率（%）",
+    ]
     st.dataframe(table_df, use_container_width=True, hide_index=True, height=520)
 
 
@@ -1183,8 +1381,8 @@ def render_stay_stats_view() -> None:
 
     st.subheader("延べ宿泊者数（全体 / 国内 / 海外）")
 
-    df = load_data()
-    if df.empty:
+    prefs = load_pref_options()
+    if prefs.empty:
         st.error(
             "データがありません。先に python -m scripts.update_data を実行して data/ を生成してください。"
         )
@@ -1196,13 +1394,8 @@ def render_stay_stats_view() -> None:
         scope_label = st.radio("地域区分", ["都道府県", "地方"], horizontal=True)
     with col2:
         if scope_label == "都道府県":
-            prefs = (
-                df[["pref_code", "pref_name"]]
-                .drop_duplicates()
-                .sort_values("pref_code")
-            )
-            pref_label = prefs.apply(
-                lambda r: f"{r['pref_code']} {r['pref_name']}", axis=1
+            pref_label = (
+                prefs["pref_code"].astype(str) + " " + prefs["pref_name"].astype(str)
             ).tolist()
             pref_map = dict(zip(pref_label, prefs["pref_code"].tolist()))
             pref_sel = st.selectbox("地域（全国/都道府県）", pref_label, index=0)
@@ -1216,12 +1409,21 @@ def render_stay_stats_view() -> None:
             scope_type = "region"
             scope_id = region_name
 
-    d_scope_all = get_scope_dataframe(df, scope_type, scope_id)
+    # キャッシュキーは地域区分・地域IDだけにし、DataFrame のハッシュ計算を避ける。
+    # 年・月の列もスコープ取得時に付与済みで、表・グラフ・Excelで使い回す。
+    stay_data_version = get_market_stats_data_version()
+    try:
+        d_scope_all = get_scope_dataframe(scope_type, scope_id, stay_data_version)
+    except Exception:
+        # 読み取り失敗はキャッシュせず、この描画だけ「データなし」として扱う。
+        d_scope_all = empty_scope_dataframe()
     if d_scope_all.empty:
         st.error("選択した地域区分/地域に対応するデータがありません。")
         return
 
-    ym_list = sorted(d_scope_all["ym"].unique().tolist())
+    ym_list, year_options = get_scope_period_options(
+        scope_type, scope_id, stay_data_version
+    )
     min_ym = ym_list[0]
     max_ym = ym_list[-1]
     default_ym_from = ym_list[max(0, len(ym_list) - 36)]
@@ -1232,9 +1434,6 @@ def render_stay_stats_view() -> None:
     default_to_year = int(default_ym_to[:4])
     default_to_month = int(default_ym_to[5:7])
 
-    year_options = sorted(
-        d_scope_all["ym"].str.slice(0, 4).astype(int).unique().tolist()
-    )
     month_options = list(range(1, 13))
 
     def format_month(m: int) -> str:
@@ -1274,32 +1473,33 @@ def render_stay_stats_view() -> None:
             "表示", ["表＋グラフ", "表のみ", "グラフのみ"], horizontal=True
         )
 
-    ym_from = build_ym(start_year, start_month)
-    ym_to = build_ym(end_year, end_month)
-
-    ym_from, from_clamped = clamp_ym_to_available_range(ym_from, min_ym, max_ym)
-    ym_to, to_clamped = clamp_ym_to_available_range(ym_to, min_ym, max_ym)
+    # 期間の補正・入れ替えは YYYYMM 整数で行い、文字列は表示用に1回だけ組み立てる。
+    min_ym_code = ym_to_int(min_ym)
+    max_ym_code = ym_to_int(max_ym)
+    ym_from_code, from_clamped = clamp_ym_code_to_available_range(
+        start_year * 100 + start_month, min_ym_code, max_ym_code
+    )
+    ym_to_code, to_clamped = clamp_ym_code_to_available_range(
+        end_year * 100 + end_month, min_ym_code, max_ym_code
+    )
+    ym_from = build_ym(*divmod(ym_from_code, 100))
+    ym_to = build_ym(*divmod(ym_to_code, 100))
     if from_clamped:
         st.warning(f"開始年月をデータ範囲に合わせて {ym_from} に補正しました。")
     if to_clamped:
         st.warning(f"終了年月をデータ範囲に合わせて {ym_to} に補正しました。")
 
-    if ym_to_int(ym_from) > ym_to_int(ym_to):
+    if ym_from_code > ym_to_code:
+        ym_from_code, ym_to_code = ym_to_code, ym_from_code
         ym_from, ym_to = ym_to, ym_from
         st.warning(
             f"開始年月と終了年月が逆だったため、{ym_from} ～ {ym_to} に入れ替えました。"
         )
 
-    d = d_scope_all[
-        (d_scope_all["ym"] >= ym_from) & (d_scope_all["ym"] <= ym_to)
-    ].copy()
-    d = d.sort_values("ym")
+    # 以降は読み取りのみなので、絞り込み結果はコピーしない。
+    # スコープは年月順で取得済みなので、二分探索の切り出し結果も年月順になる。
+    d = slice_ym_code_range(d_scope_all, ym_from_code, ym_to_code)
 
-    # 表（年月縦）
-    table = d[["ym", "total", "jp", "foreign"]].copy()
-    table = table.rename(
-        columns={"ym": "年月", "total": "全体", "jp": "国内", "foreign": "海外"}
-    )
     scope_file_id = sanitize_for_filename(f"{scope_type}_{scope_id}")
     export_file_stem = f"market_stats_{scope_file_id}_{ym_from}_{ym_to}"
     chart_mode_options = [
@@ -1321,13 +1521,10 @@ def render_stay_stats_view() -> None:
     annual_metric_label = st.session_state.get("annual_metric_export", "全体")
     if annual_metric_label not in ANNUAL_METRICS:
         annual_metric_label = "全体"
-    chart_filtered, chart_scope_all = get_chart_source_dataframes(
-        d_scope_all, ym_from, ym_to, chart_value_mode_label
-    )
-    chart_year_options = (
-        sorted(chart_scope_all["ym"].str.slice(0, 4).astype(int).unique().tolist())
-        if not chart_scope_all.empty
-        else []
+    # グラフ用データ（年計推移のローリング計算など）はグラフ表示かExcel作成時だけ作る。
+    chart_sources: tuple[pd.DataFrame, pd.DataFrame] | None = None
+    chart_year_options = get_scope_chart_year_options(
+        scope_type, scope_id, stay_data_version, chart_value_mode_label
     )
     default_chart_years = (
         chart_year_options[-4:] if len(chart_year_options) > 4 else chart_year_options
@@ -1351,13 +1548,12 @@ def render_stay_stats_view() -> None:
             horizontal=True,
             key="chart_value_mode_export",
         )
-        chart_filtered, chart_scope_all = get_chart_source_dataframes(
+        chart_sources = get_chart_source_dataframes(
             d_scope_all, ym_from, ym_to, chart_value_mode_label
         )
-        chart_year_options = (
-            sorted(chart_scope_all["ym"].str.slice(0, 4).astype(int).unique().tolist())
-            if not chart_scope_all.empty
-            else []
+        chart_filtered, chart_scope_all = chart_sources
+        chart_year_options = get_scope_chart_year_options(
+            scope_type, scope_id, stay_data_version, chart_value_mode_label
         )
         default_chart_years = (
             chart_year_options[-4:]
@@ -1430,29 +1626,51 @@ def render_stay_stats_view() -> None:
 
     if show_mode in ["表＋グラフ", "表のみ"]:
         st.subheader("表")
+        # 表（年月縦）。列抽出で新しい frame になるので、見出しはラベルの差し替えで済ませる。
+        table = d[["ym", "total", "jp", "foreign"]]
+        table.columns = ["年月", "全体", "国内", "海外"]
         st.dataframe(table, use_container_width=True, hide_index=True, height=560)
-        excel_report_bytes = build_excel_report_bytes(
-            d,
-            chart_filtered,
-            chart_scope_all,
-            {
-                "scope_type": scope_type,
-                "scope_id": scope_id,
-                "ym_from": ym_from,
-                "ym_to": ym_to,
-                "time_series_label": ts_metric_label,
-                "annual_metric_label": annual_metric_label,
-                "annual_years": selected_years_for_export,
-                "chart_value_mode_label": chart_value_mode_label,
-            },
+        excel_selection_state = {
+            "scope_type": scope_type,
+            "scope_id": scope_id,
+            "ym_from": ym_from,
+            "ym_to": ym_to,
+            "time_series_label": ts_metric_label,
+            "annual_metric_label": annual_metric_label,
+            "annual_years": selected_years_for_export,
+            "chart_value_mode_label": chart_value_mode_label,
+            "stay_data_version": stay_data_version,
+        }
+        # Excel生成は重いので、ボタン押下時だけ作り、同じ選択状態・同じデータ版の間は使い回す。
+        excel_signature = json.dumps(
+            excel_selection_state, ensure_ascii=False, sort_keys=True, default=int
         )
-        st.download_button(
-            "Excelダウンロード（データ＋グラフ）",
-            data=excel_report_bytes,
-            file_name=f"{export_file_stem}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        if st.button(
+            "Excelを作成（データ＋グラフ）",
+            key="stay_excel_build",
             use_container_width=True,
-        )
+        ):
+            if chart_sources is None:
+                chart_sources = get_chart_source_dataframes(
+                    d_scope_all, ym_from, ym_to, chart_value_mode_label
+                )
+            st.session_state["stay_excel_report"] = {
+                "signature": excel_signature,
+                "data": build_excel_report_bytes(
+                    d, chart_sources[0], chart_sources[1], excel_selection_state
+                ),
+            }
+        excel_report = st.session_state.get("stay_excel_report")
+        if excel_report and excel_report["signature"] == excel_signature:
+            st.download_button(
+                "Excelダウンロード（データ＋グラフ）",
+                data=excel_report["data"],
+                file_name=f"{export_file_stem}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True,
+            )
+        else:
+            st.caption("ボタンを押すと、現在の表示条件でExcelを作成します。")
 
     st.divider()
     st.caption("出典：観光庁『宿泊旅行統計調査』（推移表Excelを取得して整形）")
@@ -1491,24 +1709,24 @@ TCD_NIGHTS_BIN_ORDER = [
     "7泊",
     "8泊以上",
 ]
+TCD_NIGHTS_BIN_SET = frozenset(TCD_NIGHTS_BIN_ORDER)
 
 
+@st.cache_data(show_spinner=False)
 def load_tcd_meta() -> dict:
     if not TCD_META_PATH.exists():
         return {}
-    return json.loads(TCD_META_PATH.read_text(encoding="utf-8"))
+    return json.loads(TCD_META_PATH.read_bytes())
 
 
 @st.cache_data(show_spinner=False)
 def load_tcd_data() -> pd.DataFrame:
-    if not SQLITE_PATH.exists():
-        return pd.DataFrame()
-    try:
-        with sqlite3.connect(str(SQLITE_PATH)) as conn:
-            df = pd.read_sql_query(f"SELECT * FROM {TCD_TABLE_NAME}", conn)
-    except Exception:
-        return pd.DataFrame()
-
+    # 宿泊旅行統計と同じ読み取り専用・mmap 有効の共有接続で読む。
+    # 画面で使う列だけを読み、出典URL・タイトル・ハッシュ列は読み込まない。
+    df = query_market_stats(
+        "SELECT period_type, period_key, period_label, release_type, "
+        f"segment, nights_bin, value FROM {TCD_TABLE_NAME}"
+    )
     if df.empty:
         return df
 
@@ -1519,8 +1737,6 @@ def load_tcd_data() -> pd.DataFrame:
         "release_type",
         "segment",
         "nights_bin",
-        "source_url",
-        "source_title",
     ]
     for col in str_cols:
         if col in df.columns:
@@ -1529,9 +1745,40 @@ def load_tcd_data() -> pd.DataFrame:
     if "value" in df.columns:
         df["value"] = pd.to_numeric(df["value"], errors="coerce")
 
+    # 種類の少ない区分列は category にして、絞り込み・groupby をコード値で行う。
+    # value は小数を含むので float64 のまま（float32 では LOS・シェアの値が変わる）。
+    df = df.astype(
+        {col: "category" for col in ["period_type", "release_type", "segment"]}
+    )
+    # 宿泊数区分は表示順の順序付き category にし、groupby の結果を表示順で得る。
+    # 想定外の区分が来ても欠損にしないよう、カテゴリの末尾に残す。
+    extra_bins = sorted(set(df["nights_bin"]) - set(TCD_NIGHTS_BIN_ORDER))
+    df["nights_bin"] = pd.Categorical(
+        df["nights_bin"], categories=TCD_NIGHTS_BIN_ORDER + extra_bins, ordered=True
+    )
+
+    # 期間キー（"YYYY" / "YYYYQn"）の並び順を整数で持ち、並べ替えのたびに正規表現を通さない。
+    # parse_tcd_period_sort_key と同じ順序（年次は Q0 扱い、形式外は 0）になる。
+    period_parts = df["period_key"].str.extract(r"^(\d{4})(?:Q([1-4]))?$")
+    df["period_sort_key"] = (
+        pd.to_numeric(period_parts[0]).fillna(0) * 10
+        + pd.to_numeric(period_parts[1]).fillna(0)
+    ).astype("int64")
+
     return df
 
 
+@st.cache_data(show_spinner=False)
+def load_tcd_view_data() -> tuple[bool, pd.DataFrame]:
+    # 表示対象の系列への絞り込みは読み込み時に1回だけ行い、再実行のたびに走査しない。
+    # 1要素目は TCD データ自体の有無（エラーメッセージの出し分け用）。
+    df = load_tcd_data()
+    if df.empty:
+        return False, df
+    view_df = df[df["segment"].isin(TCD_SEGMENT_LABELS.keys())]
+    return True, view_df.reset_index(drop=True)
+
+
 def parse_tcd_period_sort_key(period_key: str) -> tuple[int, int]:
     m_quarter = re.fullmatch(r"(\d{4})Q([1-4])", str(period_key))
     if m_quarter:
@@ -1544,57 +1791,64 @@ def parse_tcd_period_sort_key(period_key: str) -> tuple[int, int]:
     return 0, 0
 
 
+# TCD の集計関数は入力が数百行程度なので、DataFrame 引数のハッシュをキーにしてキャッシュする。
+@st.cache_data(show_spinner=False)
 def get_tcd_period_label_map(df: pd.DataFrame) -> dict[str, str]:
     if df.empty:
         return {}
 
-    label_map: dict[str, str] = {}
-    for _, row in df[["period_key", "period_label"]].drop_duplicates().iterrows():
-        key = str(row["period_key"])
-        label = str(row["period_label"]) if pd.notna(row["period_label"]) else key
-        label_map[key] = label
-    return label_map
+    # 行ごとの Series を作らず、列配列の zip で組み立てる（重複キーは後勝ちのまま）。
+    pairs = df[["period_key", "period_label"]].drop_duplicates()
+    keys = pairs["period_key"].astype(str).tolist()
+    labels = pairs["period_label"].astype(str).tolist()
+    has_label = pairs["period_label"].notna().tolist()
+    return {
+        key: label if present else key
+        for key, label, present in zip(keys, labels, has_label)
+    }
 
 
+@st.cache_data(show_spinner=False)
 def resolve_tcd_latest_period_rows(
     df_for_period_type: pd.DataFrame,
 ) -> tuple[pd.DataFrame, str | None, str | None]:
     if df_for_period_type.empty:
         return pd.DataFrame(), None, None
 
-    period_keys = sorted(
-        df_for_period_type["period_key"].dropna().astype(str).unique().tolist(),
-        key=parse_tcd_period_sort_key,
+    # 最新期間は整数の並び順キーの最大値から引く（全キーの並べ替えはしない）。
+    # 同じキー値が複数あるときは、従来どおり後に現れた期間キーを採る。
+    sort_keys = df_for_period_type["period_sort_key"].to_numpy()
+    latest_candidates = (
+        df_for_period_type.loc[sort_keys == sort_keys.max(), "period_key"]
+        .dropna()
+        .astype(str)
+        .unique()
     )
-    if not period_keys:
+    if len(latest_candidates) == 0:
         return pd.DataFrame(), None, None
 
-    latest_period_key = period_keys[-1]
+    latest_period_key = str(latest_candidates[-1])
     latest_rows = df_for_period_type[
         df_for_period_type["period_key"] == latest_period_key
-    ].copy()
+    ]
 
     if latest_rows.empty:
         return pd.DataFrame(), None, None
 
-    if (latest_rows["release_type"] == RELEASE_FINAL).any():
-        return (
-            latest_rows[latest_rows["release_type"] == RELEASE_FINAL].copy(),
-            latest_period_key,
-            RELEASE_FINAL,
-        )
-
-    if (latest_rows["release_type"] == RELEASE_SECOND_PRELIM).any():
-        return (
-            latest_rows[latest_rows["release_type"] == RELEASE_SECOND_PRELIM].copy(),
-            latest_period_key,
-            RELEASE_SECOND_PRELIM,
-        )
+    release_types = set(latest_rows["release_type"].astype(str))
+    for preferred_release in (RELEASE_FINAL, RELEASE_SECOND_PRELIM):
+        if preferred_release in release_types:
+            return (
+                latest_rows[latest_rows["release_type"] == preferred_release],
+                latest_period_key,
+                preferred_release,
+            )
 
     release_type = str(latest_rows["release_type"].iloc[0])
     return latest_rows, latest_period_key, release_type
 
 
+@st.cache_data(show_spinner=False)
 def estimate_tcd_los_by_segment(
     df_period: pd.DataFrame, upper_open_bin_nights: float = 8.5
 ) -> pd.DataFrame:
@@ -1613,11 +1867,10 @@ def estimate_tcd_los_by_segment(
         "8\u6cca\u4ee5\u4e0a": float(upper_open_bin_nights),
     }
 
-    work = (
-        df_period.groupby(["segment", "nights_bin"], as_index=False)["value"]
-        .sum()
-        .copy()
-    )
+    # groupby の結果は新しい frame なので、追加のコピーは取らない。
+    work = df_period.groupby(["segment", "nights_bin"], as_index=False, observed=True)[
+        "value"
+    ].sum()
     work["rep_nights"] = pd.to_numeric(
         work["nights_bin"].map(representative_nights), errors="coerce"
     )
@@ -1626,23 +1879,33 @@ def estimate_tcd_los_by_segment(
         return pd.DataFrame()
 
     work["estimated_stays"] = work["value"] / work["rep_nights"]
-    summary = (
-        work.groupby("segment", as_index=False)
-        .agg(total_nights=("value", "sum"), estimated_stays=("estimated_stays", "sum"))
-        .copy()
+    # 系列は数個しかないので、ハッシュ表を作る groupby ではなく bincount で合計する。
+    # 1泊分の推定件数も同じ走査で集計し、2回目の集計と merge を省く。
+    segment_codes, segments = pd.factorize(work["segment"], sort=True)
+    n_segments = len(segments)
+    nights_values = work["value"].to_numpy(dtype="float64")
+    stays_values = work["estimated_stays"].to_numpy(dtype="float64")
+    one_night_mask = (work["nights_bin"] == "1\u6cca").to_numpy()
+    summary = pd.DataFrame(
+        {
+            "segment": segments,
+            "total_nights": np.bincount(
+                segment_codes, weights=nights_values, minlength=n_segments
+            ),
+            "estimated_stays": np.bincount(
+                segment_codes, weights=stays_values, minlength=n_segments
+            ),
+            "one_night_stays": np.bincount(
+                segment_codes[one_night_mask],
+                weights=stays_values[one_night_mask],
+                minlength=n_segments,
+            ),
+        }
     )
     summary = summary[summary["estimated_stays"] > 0].copy()
     if summary.empty:
         return pd.DataFrame()
 
-    one_night = (
-        work[work["nights_bin"] == "1\u6cca"]
-        .groupby("segment", as_index=False)["estimated_stays"]
-        .sum()
-        .rename(columns={"estimated_stays": "one_night_stays"})
-    )
-    summary = summary.merge(one_night, on="segment", how="left")
-    summary["one_night_stays"] = summary["one_night_stays"].fillna(0.0)
     summary["two_plus_stays"] = (
         summary["estimated_stays"] - summary["one_night_stays"]
     ).clip(lower=0.0)
@@ -1657,25 +1920,32 @@ def estimate_tcd_los_by_segment(
     summary["segment_label"] = summary["segment"].map(TCD_SEGMENT_LABELS)
 
     segment_order = list(TCD_SEGMENT_LABELS.keys())
-    summary["segment_order"] = summary["segment"].map(
-        {segment: idx for idx, segment in enumerate(segment_order)}
+    # segment は category なので、str にしてから順位を引く（map 結果がカテゴリ順で並ばないように）。
+    summary["segment_order"] = (
+        summary["segment"]
+        .astype(str)
+        .map({segment: idx for idx, segment in enumerate(segment_order)})
     )
     summary = summary.sort_values("segment_order").drop(columns=["segment_order"])
     return summary.reset_index(drop=True)
 
 
-def build_tcd_chart(df_period: pd.DataFrame) -> alt.Chart:
-    chart_df = (
-        df_period.groupby(["nights_bin", "segment"], as_index=False)["value"]
-        .sum()
-        .copy()
-    )
-    chart_df["segment_label"] = chart_df["segment"].map(TCD_SEGMENT_LABELS)
+def aggregate_tcd_nights_by_segment(df_period: pd.DataFrame) -> pd.DataFrame:
+    # グラフと表はこの集計結果を共有し、同じ groupby を2回行わない。
+    grouped = df_period.groupby(
+        ["nights_bin", "segment"], as_index=False, observed=True
+    )["value"].sum()
+    grouped["segment_label"] = grouped["segment"].map(TCD_SEGMENT_LABELS)
+    return grouped
 
+
+@st.cache_data(show_spinner=False)
+def build_tcd_chart(chart_df: pd.DataFrame) -> alt.Chart:
+    # nights_bin は表示順の category なので、groupby の結果がそのまま表示順になる。
     available_bins = [
         b
-        for b in TCD_NIGHTS_BIN_ORDER
-        if b in chart_df["nights_bin"].astype(str).tolist()
+        for b in chart_df["nights_bin"].astype(str).unique()
+        if b in TCD_NIGHTS_BIN_SET
     ]
 
     return (
@@ -1718,8 +1988,8 @@ def render_tcd_view() -> None:
             f"\u51e6\u7406\u6e08\u307f\u30d5\u30a1\u30a4\u30eb\u6570: {len(meta.get('processed_files', []))}"
         )
 
-    df = load_tcd_data()
-    if df.empty:
+    has_tcd_data, work = load_tcd_view_data()
+    if not has_tcd_data:
         st.error(
             "TCD\u30c7\u30fc\u30bf\u304c\u3042\u308a\u307e\u305b\u3093\u3002"
             "\u5148\u306b `python -m scripts.update_tcd_data` \u3092\u5b9f\u884c\u3057\u3066"
@@ -1727,7 +1997,7 @@ def render_tcd_view() -> None:
         )
         return
 
-    work = df[df["segment"].isin(TCD_SEGMENT_LABELS.keys())].copy()
+    # 以降の絞り込み結果は読み取りのみなので、中間の frame はコピーしない。
     if work.empty:
         st.error(
             "\u8868\u793a\u306b\u5fc5\u8981\u306a\u7cfb\u5217"
@@ -1744,7 +2014,7 @@ def render_tcd_view() -> None:
             key="tcd_period_type",
         )
     period_type = TCD_PERIOD_TYPE_KEYS[period_type_label]
-    work = work[work["period_type"] == period_type].copy()
+    work = work[work["period_type"] == period_type]
 
     if work.empty:
         st.warning(
@@ -1768,17 +2038,21 @@ def render_tcd_view() -> None:
             resolve_tcd_latest_period_rows(work)
         )
     else:
-        filtered_by_release = work[work["release_type"] == release_filter].copy()
+        filtered_by_release = work[work["release_type"] == release_filter]
         if filtered_by_release.empty:
             st.warning(
                 "\u9078\u629e\u3057\u305f\u30ea\u30ea\u30fc\u30b9\u7a2e\u5225\u306e\u30c7\u30fc\u30bf\u304c\u3042\u308a\u307e\u305b\u3093\u3002"
             )
             return
 
-        period_options = sorted(
-            filtered_by_release["period_key"].dropna().astype(str).unique().tolist(),
-            key=parse_tcd_period_sort_key,
-            reverse=True,
+        period_options = (
+            filtered_by_release.sort_values(
+                "period_sort_key", ascending=False, kind="stable"
+            )["period_key"]
+            .dropna()
+            .astype(str)
+            .unique()
+            .tolist()
         )
         period_label_map = get_tcd_period_label_map(filtered_by_release)
 
@@ -1792,7 +2066,7 @@ def render_tcd_view() -> None:
 
         filtered = filtered_by_release[
             filtered_by_release["period_key"] == selected_period_key
-        ].copy()
+        ]
         selected_release_type = release_filter
 
     if filtered.empty or selected_period_key is None or selected_release_type is None:
@@ -1826,23 +2100,21 @@ def render_tcd_view() -> None:
             "\u03a3(\u5404\u533a\u5206\u306e\u5ef6\u3079\u6cca\u6570 / \u533a\u5206\u4ee3\u8868\u5024)"
         )
 
-        share_display = (
-            los_summary[["segment_label", "one_night_share_pct", "two_plus_share_pct"]]
-            .rename(
-                columns={
-                    "segment_label": "\u7cfb\u5217",
-                    "one_night_share_pct": "1\u6cca\u30b7\u30a7\u30a2",
-                    "two_plus_share_pct": "2\u6cca\u4ee5\u4e0a\u30b7\u30a7\u30a2",
-                }
-            )
-            .copy()
+        share_display = los_summary[
+            ["segment_label", "one_night_share_pct", "two_plus_share_pct"]
+        ].rename(
+            columns={
+                "segment_label": "\u7cfb\u5217",
+                "one_night_share_pct": "1\u6cca\u30b7\u30a7\u30a2",
+                "two_plus_share_pct": "2\u6cca\u4ee5\u4e0a\u30b7\u30a7\u30a2",
+            }
         )
-        share_display["1\u6cca\u30b7\u30a7\u30a2"] = share_display[
-            "1\u6cca\u30b7\u30a7\u30a2"
-        ].map(lambda v: f"{v:.1f}%")
-        share_display["2\u6cca\u4ee5\u4e0a\u30b7\u30a7\u30a2"] = share_display[
-            "2\u6cca\u4ee5\u4e0a\u30b7\u30a7\u30a2"
-        ].map(lambda v: f"{v:.1f}%")
+        # 表示用の丸めは f"{v:.1f}%" と同じ結果になる str.format をそのまま渡す。
+        for share_col in [
+            "1\u6cca\u30b7\u30a7\u30a2",
+            "2\u6cca\u4ee5\u4e0a\u30b7\u30a7\u30a2",
+        ]:
+            share_display[share_col] = share_display[share_col].map("{:.1f}%".format)
         st.subheader(
             "\u5bbf\u6cca\u65e5\u6570\u30b7\u30a7\u30a2\uff08\u63a8\u5b9a\u4ef6\u6570\u30d9\u30fc\u30b9\uff09"
         )
@@ -1853,17 +2125,14 @@ def render_tcd_view() -> None:
             "\u03a3(\u5168\u533a\u5206\u306e\u5ef6\u3079\u6cca\u6570 / \u533a\u5206\u4ee3\u8868\u5024)"
         )
 
-    chart = build_tcd_chart(filtered).properties(height=500)
+    nights_by_segment = aggregate_tcd_nights_by_segment(filtered)
+    chart = build_tcd_chart(nights_by_segment).properties(height=500)
     st.altair_chart(chart, use_container_width=True)
 
-    table_df = (
-        filtered.groupby(["nights_bin", "segment"], as_index=False)["value"]
-        .sum()
-        .copy()
-    )
-    table_df["segment_label"] = table_df["segment"].map(TCD_SEGMENT_LABELS)
     table_pivot = (
-        table_df.pivot(index="nights_bin", columns="segment_label", values="value")
+        nights_by_segment.pivot(
+            index="nights_bin", columns="segment_label", values="value"
+        )
         .reindex(TCD_NIGHTS_BIN_ORDER)
         .reset_index()
     )
@@ -1961,10 +2230,11 @@ def first_numeric_value(df: pd.DataFrame, column: str) -> float | None:
     return float(series.iloc[0])
 
 
+@st.cache_data(show_spinner=False)
 def load_icd_meta() -> dict:
     if not ICD_META_PATH.exists():
         return {}
-    return json.loads(ICD_META_PATH.read_text(encoding="utf-8"))
+    return json.loads(ICD_META_PATH.read_bytes())
 
 
 @st.cache_data(show_spinner=False)
@@ -2536,10 +2806,11 @@ def render_icd_view() -> None:
     )
 
 
+@st.cache_data(show_spinner=False)
 def load_ta_meta() -> dict:
     if not TA_META_PATH.exists():
         return {}
-    return json.loads(TA_META_PATH.read_text(encoding="utf-8"))
+    return json.loads(TA_META_PATH.read_bytes())
 
 
 @st.cache_data(show_spinner=False)
@@ -2751,10 +3022,11 @@ def render_ta_view() -> None:
     )
 
 
+@st.cache_data(show_spinner=False)
 def load_airport_volume_meta() -> dict:
     if not AIRPORT_VOLUME_META_PATH.exists():
         return {}
-    return json.loads(AIRPORT_VOLUME_META_PATH.read_text(encoding="utf-8"))
+    return json.loads(AIRPORT_VOLUME_META_PATH.read_bytes())
 
 
 @st.cache_data(show_spinner=False)
@@ -3737,8 +4009,16 @@ def render_event_signals_view(view_mode: str = "news") -> None:
     today_jst = pd.Timestamp.now(tz="Asia/Tokyo").date()
     default_start_ym = build_ym(today_jst.year, today_jst.month)
     default_end_ym = max_ym
-    default_start_ym, _ = clamp_ym_to_available_range(default_start_ym, min_ym, max_ym)
-    default_end_ym, _ = clamp_ym_to_available_range(default_end_ym, min_ym, max_ym)
+    min_ym_code = ym_to_int(min_ym)
+    max_ym_code = ym_to_int(max_ym)
+    default_start_code, _ = clamp_ym_code_to_available_range(
+        ym_to_int(default_start_ym), min_ym_code, max_ym_code
+    )
+    default_end_code, _ = clamp_ym_code_to_available_range(
+        ym_to_int(default_end_ym), min_ym_code, max_ym_code
+    )
+    default_start_ym = build_ym(*divmod(default_start_code, 100))
+    default_end_ym = build_ym(*divmod(default_end_code, 100))
 
     year_options = sorted({int(ym[:4]) for ym in ym_options})
     month_options = list(range(1, 13))
@@ -3783,15 +4063,19 @@ def render_event_signals_view(view_mode: str = "news") -> None:
             key="signals_end_month",
         )
 
-    ym_from = build_ym(int(start_year), int(start_month))
-    ym_to = build_ym(int(end_year), int(end_month))
-    ym_from, from_clamped = clamp_ym_to_available_range(ym_from, min_ym, max_ym)
-    ym_to, to_clamped = clamp_ym_to_available_range(ym_to, min_ym, max_ym)
+    ym_from_code, from_clamped = clamp_ym_code_to_available_range(
+        int(start_year) * 100 + int(start_month), min_ym_code, max_ym_code
+    )
+    ym_to_code, to_clamped = clamp_ym_code_to_available_range(
+        int(end_year) * 100 + int(end_month), min_ym_code, max_ym_code
+    )
+    ym_from = build_ym(*divmod(ym_from_code, 100))
+    ym_to = build_ym(*divmod(ym_to_code, 100))
     if from_clamped:
         st.warning(f"開始年月をデータ範囲に合わせて {ym_from} に補正しました。")
     if to_clamped:
         st.warning(f"終了年月をデータ範囲に合わせて {ym_to} に補正しました。")
-    if ym_to_int(ym_from) > ym_to_int(ym_to):
+    if ym_from_code > ym_to_code:
         ym_from, ym_to = ym_to, ym_from
         st.warning(
             f"イベント年月が逆順だったため、{ym_from} ～ {ym_to} に入れ替えました。"
@@ -4164,8 +4448,16 @@ def render_events_view() -> None:
     default_from_ym = build_ym(today.year, today.month)
     default_to_date = today + timedelta(days=365)
     default_to_ym = build_ym(default_to_date.year, default_to_date.month)
-    default_from_ym, _ = clamp_ym_to_available_range(default_from_ym, min_ym, max_ym)
-    default_to_ym, _ = clamp_ym_to_available_range(default_to_ym, min_ym, max_ym)
+    min_ym_code = ym_to_int(min_ym)
+    max_ym_code = ym_to_int(max_ym)
+    default_from_code, _ = clamp_ym_code_to_available_range(
+        ym_to_int(default_from_ym), min_ym_code, max_ym_code
+    )
+    default_to_code, _ = clamp_ym_code_to_available_range(
+        ym_to_int(default_to_ym), min_ym_code, max_ym_code
+    )
+    default_from_ym = build_ym(*divmod(default_from_code, 100))
+    default_to_ym = build_ym(*divmod(default_to_code, 100))
 
     year_options = sorted({int(ym[:4]) for ym in ym_options})
     month_options = list(range(1, 13))
@@ -4210,15 +4502,19 @@ def render_events_view() -> None:
             key="events_end_month",
         )
 
-    ym_from = build_ym(int(start_year), int(start_month))
-    ym_to = build_ym(int(end_year), int(end_month))
-    ym_from, from_clamped = clamp_ym_to_available_range(ym_from, min_ym, max_ym)
-    ym_to, to_clamped = clamp_ym_to_available_range(ym_to, min_ym, max_ym)
+    ym_from_code, from_clamped = clamp_ym_code_to_available_range(
+        int(start_year) * 100 + int(start_month), min_ym_code, max_ym_code
+    )
+    ym_to_code, to_clamped = clamp_ym_code_to_available_range(
+        int(end_year) * 100 + int(end_month), min_ym_code, max_ym_code
+    )
+    ym_from = build_ym(*divmod(ym_from_code, 100))
+    ym_to = build_ym(*divmod(ym_to_code, 100))
     if from_clamped:
         st.warning(f"開始年月をデータ範囲に合わせて {ym_from} に補正しました。")
     if to_clamped:
         st.warning(f"終了年月をデータ範囲に合わせて {ym_to} に補正しました。")
-    if ym_to_int(ym_from) > ym_to_int(ym_to):
+    if ym_from_code > ym_to_code:
         ym_from, ym_to = ym_to, ym_from
         st.warning(
             f"開始年月と終了年月が逆だったため、{ym_from} ～ {ym_to} に入れ替えました。"
@@ -4,6 +4,7 @@ import re
 from dataclasses import dataclass
 from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -17,6 +18,12 @@ class HeaderLayout:
 
 MONTH_RE = re.compile(r"^\s*(\d{1,2})\s*月\s*$")
 ERA_RE = re.compile(r"^\s*(昭和|平成|令和)\s*([0-9]{1,2}|元)\s*年\s*$")
+PREF_RE = re.compile(r"^(\d{2})(.+)$")
+# 元年の前年（Showa 1 = 1926, Heisei 1 = 1989, Reiwa 1 = 2019）
+ERA_BASE_YEAR = {"昭和": 1925, "平成": 1988, "令和": 2018}
+WHITESPACE_RE = re.compile(r"\s+")
+# 都道府県ラベル中の半角・全角スペースを1回の translate で除去する
+PREF_LABEL_SPACE_TABLE = str.maketrans("", "", " \u3000")
 
 
 def _to_int_era_year(s: str) -> Tuple[str, int]:
@@ -34,14 +41,10 @@ def _to_int_era_year(s: str) -> Tuple[str, int]:
 
 
 def _era_to_gregorian(era: str, year: int) -> int:
-    # Showa 1 = 1926, Heisei 1 = 1989, Reiwa 1 = 2019
-    if era == "昭和":
-        return 1925 + year
-    if era == "平成":
-        return 1988 + year
-    if era == "令和":
-        return 2018 + year
-    raise ValueError(f"Unknown era: {era}")
+    base = ERA_BASE_YEAR.get(era)
+    if base is None:
+        raise ValueError(f"Unknown era: {era}")
+    return base + year
 
 
 def detect_layout(
@@ -55,10 +58,13 @@ def detect_layout(
     month_row = None
     first_data_col = None
 
-    for r in range(1, scan_rows + 1):
-        for c in range(1, scan_cols + 1):
-            v = ws.cell(r, c).value
-            if v is None:
+    rows = ws.iter_rows(
+        min_row=1, max_row=scan_rows, max_col=scan_cols, values_only=True
+    )
+    for r, row in enumerate(rows, start=1):
+        for c, v in enumerate(row, start=1):
+            # 数値セル（データ部）は '1月' になり得ないので文字列化しない
+            if v is None or isinstance(v, (int, float)):
                 continue
             if MONTH_RE.match(str(v)):
                 month_row = r
@@ -84,14 +90,25 @@ def build_ym_by_col(
     """
     yms: List[Tuple[int, str]] = []
     current_year_label: Optional[str] = None
+    current_year_g: Optional[int] = None
+
+    # 年・月ヘッダ2行をまとめて読む（次列の先読み分 +1 列）
+    first_col = layout.first_data_col
+    year_values, month_values = ws.iter_rows(
+        min_row=layout.year_row,
+        max_row=layout.month_row,
+        min_col=first_col,
+        max_col=first_col + max_cols,
+        values_only=True,
+    )
 
-    for c in range(layout.first_data_col, layout.first_data_col + max_cols):
-        month_v = ws.cell(layout.month_row, c).value
+    for c in range(first_col, first_col + max_cols):
+        month_v = month_values[c - first_col]
         if month_v is None:
             # ヘッダ終端（連続None）を許容
             if len(yms) > 0:
                 # 次以降もNoneが続くなら打ち切り
-                next_v = ws.cell(layout.month_row, c + 1).value
+                next_v = month_values[c + 1 - first_col]
                 if next_v is None:
                     break
             continue
@@ -104,17 +121,23 @@ def build_ym_by_col(
             continue
 
         # 年ラベル（結合セル）を左→右に伝播
-        year_v = ws.cell(layout.year_row, c).value
+        # 和暦→西暦の変換はラベルが変わったときだけ行う（結合セルで12列続く）
+        year_v = year_values[c - first_col]
         if year_v is not None:
-            current_year_label = str(year_v).strip()
+            year_label = str(year_v).strip()
+            if year_label != current_year_label:
+                current_year_label = year_label
+                current_year_g = (
+                    _era_to_gregorian(*_to_int_era_year(year_label))
+                    if year_label
+                    else None
+                )
 
         if not current_year_label:
             raise ValueError(f"Missing year label around col={c} (month={month_v}).")
 
-        era, era_year = _to_int_era_year(current_year_label)
-        year_g = _era_to_gregorian(era, era_year)
         month_i = int(m.group(1))
-        ym = f"{year_g:04d}-{month_i:02d}"
+        ym = f"{current_year_g:04d}-{month_i:02d}"
         yms.append((c, ym))
 
     if not yms:
@@ -130,16 +153,46 @@ def iter_pref_rows(
     - '01北海道' -> ('01', '北海道')
     - '全 国' / '全国' -> ('00', '全国')  ※ただしMVPでは合算生成するので後で除外推奨
     """
+    # 先読み分 +1 行を含めて1列目をまとめて読む
+    block = _read_row_block(ws, start_row, start_row + max_rows, max_col=1)
+    yield from _iter_pref_labels([row[0] for row in block], start_row, max_rows)
+
+
+def _read_row_block(
+    ws: Worksheet, min_row: int, max_row: int, max_col: int
+) -> List[tuple]:
+    """
+    min_row..max_row を値タプルのリストでまとめて読む。
+    シート末尾より後ろは空行で埋める。通常モードでは末尾以降を読むと空セルが
+    生成されるので読まない（read-only はストリームが途中で終わるだけ）。
+    """
+    read_max_row = max_row
+    if isinstance(ws, Worksheet):
+        read_max_row = min(max_row, ws.max_row)
+    block = list(
+        ws.iter_rows(
+            min_row=min_row, max_row=read_max_row, max_col=max_col, values_only=True
+        )
+    )
+    missing = (max_row - min_row + 1) - len(block)
+    if missing > 0:
+        block.extend([(None,) * max_col] * missing)
+    return block
+
+
+def _iter_pref_labels(
+    labels: List[object], start_row: int, max_rows: int
+) -> Iterable[Tuple[int, str, str]]:
     for r in range(start_row, start_row + max_rows):
-        v = ws.cell(r, 1).value
+        v = labels[r - start_row]
         if v is None:
             # 連続空で打ち切り
-            nxt = ws.cell(r + 1, 1).value
+            nxt = labels[r + 1 - start_row]
             if nxt is None:
                 break
             continue
 
-        s = str(v).strip().replace("　", "").replace(" ", "")
+        s = str(v).strip().translate(PREF_LABEL_SPACE_TABLE)
         if not s:
             continue
 
@@ -147,7 +200,7 @@ def iter_pref_rows(
             yield r, "00", "全国"
             continue
 
-        m = re.match(r"^(\d{2})(.+)$", s)
+        m = PREF_RE.match(s)
         if not m:
             # 想定外行はスキップ（注記行など）
             continue
@@ -164,33 +217,61 @@ def parse_sheet_long(ws: Worksheet, metric: str) -> pd.DataFrame:
 
     # pref starts the row right below month header
     pref_start_row = layout.month_row + 1
-    rows = []
-    for r, pref_code, pref_name in iter_pref_rows(ws, start_row=pref_start_row):
+    max_rows = 200
+    # セル単位の ws.cell ではなく、対象範囲を行タプルでまとめて読む
+    block = _read_row_block(
+        ws, pref_start_row, pref_start_row + max_rows, max_col=ym_cols[-1][0]
+    )
+    labels = [row[0] for row in block]
+    # 行ごとの dict ではなく列ごとのリストに積む（pref は行単位でまとめて伸ばす）
+    ym_values: List[str] = []
+    pref_codes: List[str] = []
+    pref_names: List[str] = []
+    values: List[float] = []
+    for r, pref_code, pref_name in _iter_pref_labels(labels, pref_start_row, max_rows):
+        row = block[r - pref_start_row]
+        n_before = len(values)
         for c, ym in ym_cols:
-            val = ws.cell(r, c).value
+            val = row[c - 1]
             if val is None:
                 continue
             if isinstance(val, (int, float)):
-                rows.append(
-                    {
-                        "ym": ym,
-                        "pref_code": pref_code,
-                        "pref_name": pref_name,
-                        "metric": metric,
-                        "value": float(val),
-                    }
-                )
+                ym_values.append(ym)
+                values.append(float(val))
+        n_added = len(values) - n_before
+        pref_codes.extend([pref_code] * n_added)
+        pref_names.extend([pref_name] * n_added)
 
-    if not rows:
+    if not values:
         raise ValueError(f"No numeric rows parsed for metric={metric}.")
-    return pd.DataFrame(rows)
+    return pd.DataFrame(
+        {
+            "ym": ym_values,
+            "pref_code": pref_codes,
+            "pref_name": pref_names,
+            "metric": metric,
+            "value": np.array(values, dtype=np.float64),
+        }
+    )
+
+
+def _parse_sheet_series(ws: Worksheet, metric: str) -> pd.Series:
+    """
+    parse_sheet_long の結果を (ym, pref_code, pref_name) インデックスの
+    1列 Series にする。同一キーが複数行ある場合は合算する。
+    """
+    df = parse_sheet_long(ws, metric)
+    values = df.set_index(["ym", "pref_code", "pref_name"])["value"].rename(metric)
+    if not values.index.is_unique:
+        values = values.groupby(level=[0, 1, 2]).sum()
+    return values
 
 
 def _normalize_compact_text(value: object) -> str:
     if value is None:
         return ""
     text = str(value).replace("\u3000", " ").replace("\n", "")
-    text = re.sub(r"\s+", "", text)
+    text = WHITESPACE_RE.sub("", text)
     return text.strip()
 
 
@@ -215,7 +296,7 @@ def _parse_pref_cell(value: object) -> Optional[Tuple[str, str]]:
         return None
     if s.startswith("全"):
         return "00", "全国"
-    m = re.match(r"^(\d{2})(.+)$", s)
+    m = PREF_RE.match(s)
     if not m:
         return None
     return m.group(1), m.group(2)
@@ -233,18 +314,28 @@ def parse_facility_occupancy_monthly_sheet(
     ym_cols = build_ym_by_col(ws, layout, max_cols=max_cols)
 
     pref_start_row = layout.month_row + 1
-    rows = []
+    ym_values: List[str] = []
+    pref_codes: List[str] = []
+    pref_names: List[str] = []
+    facility_types: List[str] = []
+    rates: List[float] = []
     current_pref_code = ""
     current_pref_name = ""
     blank_streak = 0
 
-    for r in range(pref_start_row, pref_start_row + max_rows):
-        pref_raw = ws.cell(r, 1).value
-        facility_raw = ws.cell(r, 2).value
+    sheet_rows = ws.iter_rows(
+        min_row=pref_start_row,
+        max_row=pref_start_row + max_rows - 1,
+        max_col=max(2, ym_cols[-1][0]),
+        values_only=True,
+    )
+    for values in sheet_rows:
+        pref_raw = values[0]
+        facility_raw = values[1]
 
         if pref_raw is None and facility_raw is None:
             blank_streak += 1
-            if blank_streak >= 6 and rows:
+            if blank_streak >= 6 and rates:
                 break
             continue
         blank_streak = 0
@@ -259,24 +350,30 @@ def parse_facility_occupancy_monthly_sheet(
         if not current_pref_code or not current_pref_name:
             continue
 
+        n_before = len(rates)
         for c, ym in ym_cols:
-            value = _to_float_or_none(ws.cell(r, c).value)
+            value = _to_float_or_none(values[c - 1])
             if value is None:
                 continue
-            rows.append(
-                {
-                    "ym": ym,
-                    "pref_code": current_pref_code,
-                    "pref_name": current_pref_name,
-                    "facility_type": facility_type,
-                    "occupancy_rate": value,
-                }
-            )
-
-    if not rows:
+            ym_values.append(ym)
+            rates.append(value)
+        n_added = len(rates) - n_before
+        pref_codes.extend([current_pref_code] * n_added)
+        pref_names.extend([current_pref_name] * n_added)
+        facility_types.extend([facility_type] * n_added)
+
+    if not rates:
         raise ValueError("No facility occupancy rows were parsed.")
 
-    out = pd.DataFrame(rows)
+    out = pd.DataFrame(
+        {
+            "ym": ym_values,
+            "pref_code": pref_codes,
+            "pref_name": pref_names,
+            "facility_type": facility_types,
+            "occupancy_rate": np.array(rates, dtype=np.float64),
+        }
+    )
     out = out.drop_duplicates(subset=["ym", "pref_code", "facility_type"])
     out = out.sort_values(["ym", "pref_code", "facility_type"]).reset_index(drop=True)
     return out
@@ -303,24 +400,18 @@ def build_raw_from_three_sheets(
     Returns wide RAW:
       ym, pref_code, pref_name, total, jp, foreign
     """
-    df_t = parse_sheet_long(ws_total, "total")
-    df_j = parse_sheet_long(ws_jp, "jp")
-    df_f = parse_sheet_long(ws_foreign, "foreign")
-
-    df = pd.concat([df_t, df_j, df_f], ignore_index=True)
-
-    wide = df.pivot_table(
-        index=["ym", "pref_code", "pref_name"],
-        columns="metric",
-        values="value",
-        aggfunc="sum",
-    ).reset_index()
+    # シートごとに (ym, pref) キーの列を作り、long 化 → pivot を経ずに横結合する
+    series = [
+        _parse_sheet_series(ws_total, "total"),
+        _parse_sheet_series(ws_jp, "jp"),
+        _parse_sheet_series(ws_foreign, "foreign"),
+    ]
+    # 列順は従来の pivot_table 出力（metric 名の昇順）に合わせる
+    series.sort(key=lambda s: s.name)
+    wide = pd.concat(series, axis=1, join="outer").sort_index()
 
     # 欠損を0に（シート構造差の保険）
-    for col in ["total", "jp", "foreign"]:
-        if col not in wide.columns:
-            wide[col] = 0.0
-        wide[col] = wide[col].fillna(0.0)
+    wide = wide.fillna(0.0).reset_index()
 
     # 全国行はファイル由来を採用せず、都道府県合算で生成（ズレ耐性）
     if make_national_sum:
@@ -12,6 +12,8 @@ import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 from openpyxl import load_workbook
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 try:
     from .parse_ts_table import (
@@ -71,11 +73,8 @@ def has_required_facility_occupancy_schema(sqlite_path: Path) -> bool:
 
 
 def sha256_file(p: Path) -> str:
-    h = hashlib.sha256()
     with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 def find_ts_table_xlsx_url(html: str, base_url: str) -> str:
@@ -109,8 +108,25 @@ def find_ts_table_xlsx_url(html: str, base_url: str) -> str:
     return links[0][0]
 
 
-def fetch_html_text(url: str, timeout_sec: int = 60) -> str:
-    response = requests.get(url, timeout=timeout_sec)
+def build_session() -> requests.Session:
+    # ページ取得と xlsx ダウンロードで同じ接続（keep-alive）を使い回す。
+    # 一時的な混雑・障害（429 / 5xx）も update_tcd_data と同じく再試行の対象にする。
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+    )
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+
+def fetch_html_text(
+    url: str, timeout_sec: int = 60, session: requests.Session | None = None
+) -> str:
+    http = session or requests
+    response = http.get(url, timeout=timeout_sec)
     response.raise_for_status()
 
     # 観光庁ページは requests が ISO-8859-1 と誤判定することがある。
@@ -222,11 +238,17 @@ def save_meta(meta: dict) -> None:
     )
 
 
-def download_file(url: str, dst: Path, timeout_sec: int = 60) -> None:
-    with requests.get(url, stream=True, timeout=timeout_sec) as r:
+def download_file(
+    url: str,
+    dst: Path,
+    timeout_sec: int = 60,
+    session: requests.Session | None = None,
+) -> None:
+    http = session or requests
+    with http.get(url, stream=True, timeout=timeout_sec) as r:
         r.raise_for_status()
         with dst.open("wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 64):
+            for chunk in r.iter_content(chunk_size=1024 * 1024):
                 if chunk:
                     f.write(chunk)
 
@@ -269,12 +291,12 @@ def build_sqlite(
 def main() -> int:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    html = fetch_html_text(SOURCE_PAGE_URL, timeout_sec=60)
-    xlsx_url = find_ts_table_xlsx_url(html, SOURCE_PAGE_URL)
+    with build_session() as session, tempfile.TemporaryDirectory() as td:
+        html = fetch_html_text(SOURCE_PAGE_URL, timeout_sec=60, session=session)
+        xlsx_url = find_ts_table_xlsx_url(html, SOURCE_PAGE_URL)
 
-    with tempfile.TemporaryDirectory() as td:
         tmp_xlsx = Path(td) / "ts_table.xlsx"
-        download_file(xlsx_url, tmp_xlsx)
+        download_file(xlsx_url, tmp_xlsx, session=session)
 
         fetched_sha = sha256_file(tmp_xlsx)
         meta = load_meta()
@@ -286,7 +308,7 @@ def main() -> int:
             print("No change: source file hash unchanged.")
             return 0
 
-        wb = load_workbook(tmp_xlsx, read_only=False, data_only=True)
+        wb = load_workbook(tmp_xlsx, read_only=True, data_only=True)
         try:
             df = build_market_stats_from_workbook(wb)
             df_facility_occupancy = build_facility_occupancy_from_workbook(wb)
@@ -2,19 +2,26 @@ from __future__ import annotations
 
 import hashlib
 import json
+import posixpath
 import re
 import sqlite3
 import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urljoin
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from openpyxl import load_workbook
 from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # 観光庁: 旅行・観光消費動向調査
 TCD_SOURCE_PAGE_URL = "https://www.mlit.go.jp/kankocho/siryou/toukei/shouhidoukou.html"
@@ -26,21 +33,27 @@ META_TCD_PATH = DATA_DIR / "meta_tcd.json"
 TABLE_NAME = "tcd_stay_nights"
 
 NIGHTS_BIN_ORDER = ["1泊", "2泊", "3泊", "4泊", "5泊", "6泊", "7泊", "8泊以上"]
+NIGHTS_BIN_SET = frozenset(NIGHTS_BIN_ORDER)
+NIGHTS_BIN_DTYPE = pd.CategoricalDtype(NIGHTS_BIN_ORDER, ordered=True)
 TARGET_SEGMENTS = [("domestic_total", 2), ("domestic_business", 5)]
+# T06 で参照する列の範囲（期間表記の遡り探索は A〜F 列）。
+T06_SCAN_MAX_COL = 6
+SPACE_TABLE = str.maketrans("", "", " \u3000")
+PERIOD_DASH_TABLE = str.maketrans({"〜": "-", "～": "-", "−": "-", "－": "-", "―": "-"})
+QUARTER_RANGE_RE = re.compile(r"(20\d{2})年\s*([1-9]|1[0-2])\s*-\s*([1-9]|1[0-2])月")
+QUARTER_Q_RE = re.compile(r"(20\d{2})年\s*Q([1-4])", flags=re.IGNORECASE)
+ANNUAL_RE = re.compile(r"(20\d{2})年")
+NIGHTS_BIN_RE = re.compile(r"^([1-7])泊")
+PERIOD_KEY_QUARTER_RE = re.compile(r"(\d{4})Q([1-4])")
+PERIOD_KEY_ANNUAL_RE = re.compile(r"(\d{4})")
+# 同一ホストへの並列ダウンロード数（接続プールの上限も揃える）。
+DOWNLOAD_MAX_WORKERS = 8
 
 
 def now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def load_meta_tcd() -> dict:
     if not META_TCD_PATH.exists():
         return {}
@@ -54,20 +67,63 @@ def save_meta_tcd(meta: dict) -> None:
     )
 
 
-def fetch_source_page(url: str) -> str:
-    res = requests.get(url, timeout=60)
+def build_session() -> requests.Session:
+    # ページ取得と各 Excel のダウンロードで接続（keep-alive）を使い回す。
+    # 一時的な混雑・障害（429 / 5xx）も再試行の対象にする。
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=DOWNLOAD_MAX_WORKERS,
+        pool_maxsize=DOWNLOAD_MAX_WORKERS,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_source_page(
+    url: str,
+    session: requests.Session | None = None,
+    cached: dict[str, str] | None = None,
+) -> dict[str, str] | None:
+    """HTML と sha256 / etag / last_modified を返す。cached の検証子で 304 なら None。"""
+    http = session or requests
+    headers: dict[str, str] = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    res = http.get(url, timeout=60, headers=headers)
+    if res.status_code == 304:
+        return None
     res.raise_for_status()
     if not res.encoding or res.encoding.lower() == "iso-8859-1":
         res.encoding = res.apparent_encoding
-    return res.text
+    return {
+        "html": res.text,
+        "sha256": hashlib.sha256(res.content).hexdigest(),
+        "etag": res.headers.get("ETag", ""),
+        "last_modified": res.headers.get("Last-Modified", ""),
+    }
 
 
 def normalize_text(value: object) -> str:
+    # 空セル（None）が大半なので str() を通さずに返す。
+    if value is None:
+        return ""
     return str(value or "").strip()
 
 
 def extract_target_excel_links(html: str, base_url: str) -> list[dict[str, str]]:
-    soup = BeautifulSoup(html, "html.parser")
+    # 必要なのはリンクだけなので、<a> 以外のノードはツリーに組み立てない。
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a"))
     out: list[dict[str, str]] = []
     seen: set[str] = set()
 
@@ -83,7 +139,7 @@ def extract_target_excel_links(html: str, base_url: str) -> list[dict[str, str]]
             continue
 
         # サイト本文の文字化け・表記揺れに備え、URLヒントでも拾う。
-        compact_text = text.replace(" ", "").replace("　", "")
+        compact_text = text.translate(SPACE_TABLE)
         has_target_hint = ("集計表" in compact_text) or ("/content/" in lower_url)
         if not has_target_hint:
             continue
@@ -103,13 +159,117 @@ def extract_target_excel_links(html: str, base_url: str) -> list[dict[str, str]]
     return out
 
 
-def download_file(url: str, dst: Path) -> None:
-    with requests.get(url, stream=True, timeout=120) as res:
+def load_source_links(
+    session: requests.Session, old_meta: dict
+) -> tuple[list[dict[str, str]], dict[str, str]]:
+    """Excel リンク一覧と、次回の条件付き GET 用のページ検証子を返す。"""
+    cached_links = [
+        {"url": str(x["url"]), "link_text": str(x.get("link_text") or "")}
+        for x in old_meta.get("cached_links", [])
+        if x.get("url")
+    ]
+    cached_page = {
+        "sha256": str(old_meta.get("source_page_sha256") or ""),
+        "etag": str(old_meta.get("source_page_etag") or ""),
+        "last_modified": str(old_meta.get("source_page_last_modified") or ""),
+    }
+
+    page = fetch_source_page(
+        TCD_SOURCE_PAGE_URL, session=session, cached=cached_page if cached_links else None
+    )
+    if page is None:
+        # 304: ページは前回から変わっていないので、保存済みのリンク一覧をそのまま使う。
+        return cached_links, cached_page
+
+    validators = {key: page[key] for key in ("sha256", "etag", "last_modified")}
+    if cached_links and page["sha256"] == cached_page["sha256"]:
+        # 検証子が効かないサーバーでも、本文が同一なら HTML の解析は省く。
+        return cached_links, validators
+    return extract_target_excel_links(page["html"], TCD_SOURCE_PAGE_URL), validators
+
+
+def download_file(
+    url: str,
+    dst: Path,
+    session: requests.Session | None = None,
+    cached: dict[str, str] | None = None,
+) -> dict[str, str] | None:
+    """ダウンロードして sha256 / etag / last_modified を返す。cached の検証子で 304 なら None。"""
+    http = session or requests
+    headers: dict[str, str] = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    # 書き込みと同じチャンクで SHA-256 を計算し、保存後の再読込を省く。
+    digest = hashlib.sha256()
+    with http.get(url, stream=True, timeout=120, headers=headers) as res:
+        if res.status_code == 304:
+            return None
         res.raise_for_status()
         with dst.open("wb") as f:
-            for chunk in res.iter_content(chunk_size=1024 * 64):
+            for chunk in res.iter_content(chunk_size=1024 * 1024):
                 if chunk:
+                    digest.update(chunk)
                     f.write(chunk)
+        return {
+            "sha256": digest.hexdigest(),
+            "etag": res.headers.get("ETag", ""),
+            "last_modified": res.headers.get("Last-Modified", ""),
+        }
+
+
+def download_links(
+    links: list[dict[str, str]],
+    dst_dir: Path,
+    session: requests.Session,
+    cached_files: dict[str, dict[str, str]] | None = None,
+) -> list[dict[str, str]]:
+    cached_files = cached_files or {}
+
+    def download_one(indexed_link: tuple[int, dict[str, str]]) -> dict[str, str]:
+        idx, link = indexed_link
+        url = link["url"]
+        local_path = dst_dir / f"tcd_{idx:03d}.xlsx"
+        cached = cached_files.get(url)
+        downloaded = download_file(url, local_path, session=session, cached=cached)
+        if downloaded is None:
+            # 304: 本体は取得せず、前回の sha256 と検証子を引き継ぐ（local_path は空）。
+            return {
+                "url": url,
+                "link_text": link["link_text"],
+                "local_path": "",
+                "sha256": cached["sha256"],
+                "etag": cached.get("etag", ""),
+                "last_modified": cached.get("last_modified", ""),
+            }
+        return {
+            "url": url,
+            "link_text": link["link_text"],
+            "local_path": str(local_path),
+            **downloaded,
+        }
+
+    # 待ち時間の大半はネットワークなので並列に取得し、結果はリンク順のまま返す。
+    max_workers = max(1, min(DOWNLOAD_MAX_WORKERS, len(links)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(download_one, enumerate(links)))
+
+
+def build_processed_entry(item: dict[str, str], title_a1: str, fetched_at: str) -> dict:
+    entry = {
+        "url": item["url"],
+        "sha256": item["sha256"],
+        "title_a1": title_a1,
+        "fetched_at": fetched_at,
+    }
+    # 次回の条件付き GET 用に、サーバーが返した検証子だけを残す。
+    for key in ("etag", "last_modified"):
+        if item.get(key):
+            entry[key] = item[key]
+    return entry
 
 
 def get_title_a1(workbook: Workbook) -> str:
@@ -120,6 +280,112 @@ def get_title_a1(workbook: Workbook) -> str:
     return normalize_text(ws["A1"].value)
 
 
+def _xml_local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _xml_attr(elem: ET.Element, local_name: str) -> str | None:
+    for key, value in elem.attrib.items():
+        if _xml_local_name(key) == local_name:
+            return value
+    return None
+
+
+def _read_shared_string(zf: zipfile.ZipFile, index: int) -> str | None:
+    try:
+        source = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return None
+    with source:
+        count = 0
+        for _, elem in ET.iterparse(source):
+            if _xml_local_name(elem.tag) != "si":
+                continue
+            if count == index:
+                # ふりがな（rPh）は openpyxl と同様に除外し、本文の t / r>t だけを連結する。
+                parts: list[str] = []
+                for child in elem:
+                    name = _xml_local_name(child.tag)
+                    if name == "t":
+                        parts.append(child.text or "")
+                    elif name == "r":
+                        parts.extend(
+                            t.text or "" for t in child if _xml_local_name(t.tag) == "t"
+                        )
+                return "".join(parts)
+            count += 1
+            elem.clear()
+    return None
+
+
+def peek_title_a1(path: Path) -> str | None:
+    """表題シート（無ければ先頭シート）の A1 を zip から直接読む。読めない場合は None。"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            sheets: list[tuple[str, str | None]] = []
+            with zf.open("xl/workbook.xml") as source:
+                for _, elem in ET.iterparse(source):
+                    if _xml_local_name(elem.tag) == "sheet":
+                        sheets.append((elem.get("name", ""), _xml_attr(elem, "id")))
+            if not sheets:
+                return None
+            rel_id = next((rid for name, rid in sheets if name == "表題"), sheets[0][1])
+
+            target = None
+            with zf.open("xl/_rels/workbook.xml.rels") as source:
+                for _, elem in ET.iterparse(source):
+                    if _xml_local_name(elem.tag) == "Relationship" and elem.get("Id") == rel_id:
+                        target = elem.get("Target")
+                        break
+            if not target:
+                return None
+            if target.startswith("/"):
+                sheet_path = target.lstrip("/")
+            else:
+                sheet_path = posixpath.normpath(posixpath.join("xl", target))
+
+            with zf.open(sheet_path) as source:
+                for _, elem in ET.iterparse(source):
+                    name = _xml_local_name(elem.tag)
+                    if name == "row":
+                        # 先頭行に A1 が無ければ空セル扱い。
+                        return ""
+                    if name != "c":
+                        continue
+                    ref = elem.get("r")
+                    if ref is None:
+                        # 参照省略のセルは位置を確定できないため openpyxl に任せる。
+                        return None
+                    if ref != "A1":
+                        return ""
+                    cell_type = elem.get("t")
+                    values = {_xml_local_name(child.tag): child for child in elem}
+                    if cell_type == "inlineStr":
+                        inline = values.get("is")
+                        if inline is None:
+                            return ""
+                        return normalize_text(
+                            "".join(
+                                t.text or ""
+                                for t in inline.iter()
+                                if _xml_local_name(t.tag) == "t"
+                            )
+                        )
+                    v = values.get("v")
+                    if v is None or v.text is None:
+                        return ""
+                    if cell_type == "s":
+                        shared = _read_shared_string(zf, int(v.text))
+                        return None if shared is None else normalize_text(shared)
+                    if cell_type == "str":
+                        return normalize_text(v.text)
+                    # 数値・真偽値などは openpyxl の型変換に任せる。
+                    return None
+            return ""
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, ValueError, OSError):
+        return None
+
+
 def normalize_release_type(text: str) -> str | None:
     if "確報" in text:
         return "確報"
@@ -129,19 +395,10 @@ def normalize_release_type(text: str) -> str | None:
 
 
 def parse_period_from_text(text: str) -> tuple[str, str, str] | None:
-    normalized = (
-        text.replace("〜", "-")
-        .replace("～", "-")
-        .replace("−", "-")
-        .replace("－", "-")
-        .replace("―", "-")
-    )
+    normalized = text.translate(PERIOD_DASH_TABLE)
 
     # 例: 2025年1-3月期
-    m_quarter_range = re.search(
-        r"(20\d{2})年\s*([1-9]|1[0-2])\s*-\s*([1-9]|1[0-2])月",
-        normalized,
-    )
+    m_quarter_range = QUARTER_RANGE_RE.search(normalized)
     if m_quarter_range:
         year = int(m_quarter_range.group(1))
         start_month = int(m_quarter_range.group(2))
@@ -150,7 +407,7 @@ def parse_period_from_text(text: str) -> tuple[str, str, str] | None:
         return "quarter", key, f"{year}年Q{quarter}"
 
     # 例: 2025年Q1
-    m_quarter_q = re.search(r"(20\d{2})年\s*Q([1-4])", normalized, flags=re.IGNORECASE)
+    m_quarter_q = QUARTER_Q_RE.search(normalized)
     if m_quarter_q:
         year = int(m_quarter_q.group(1))
         quarter = int(m_quarter_q.group(2))
@@ -158,7 +415,7 @@ def parse_period_from_text(text: str) -> tuple[str, str, str] | None:
         return "quarter", key, f"{year}年Q{quarter}"
 
     # 例: 2024年
-    m_annual = re.search(r"(20\d{2})年", normalized)
+    m_annual = ANNUAL_RE.search(normalized)
     if m_annual:
         year = m_annual.group(1)
         return "annual", year, f"{year}年"
@@ -180,14 +437,18 @@ def parse_title_metadata(title_a1: str, link_text: str) -> tuple[str, str, str,
 
 
 def normalize_nights_bin(value: object) -> str | None:
-    s = normalize_text(value).replace(" ", "").replace("　", "")
+    # 表記ゆれの無いセル（大半）は集合の照合だけで返す。
+    if isinstance(value, str) and value in NIGHTS_BIN_SET:
+        return value
+
+    s = normalize_text(value).translate(SPACE_TABLE)
     if not s:
         return None
 
     if "8泊" in s and "以上" in s:
         return "8泊以上"
 
-    m = re.match(r"^([1-7])泊", s)
+    m = NIGHTS_BIN_RE.match(s)
     if m:
         return f"{m.group(1)}泊"
 
@@ -210,23 +471,33 @@ def to_float(value: object) -> float | None:
         return None
 
 
-def find_t06_section_rows(ws: Worksheet) -> list[int]:
+def read_sheet_rows(ws: Worksheet | ReadOnlyWorksheet, max_col: int) -> list[tuple]:
+    # read_only では <dimension> 宣言が実データより狭いファイルで行が欠けるため、宣言を捨てて全行を読む。
+    if isinstance(ws, ReadOnlyWorksheet):
+        ws.reset_dimensions()
+    return list(ws.iter_rows(min_row=1, max_col=max_col, values_only=True))
+
+
+def find_t06_section_rows(rows: list[tuple]) -> list[int]:
     starts: list[int] = []
-    for row in range(1, ws.max_row + 1):
-        a = normalize_text(ws.cell(row=row, column=1).value).replace(" ", "").replace("　", "")
-        if a == "宿泊数":
-            starts.append(row)
+    for idx, row in enumerate(rows):
+        a = row[0]
+        # 数値・空セルは見出しになり得ないので、文字列のときだけ空白除去して比較する。
+        if not isinstance(a, str):
+            continue
+        if a == "宿泊数" or normalize_text(a).translate(SPACE_TABLE) == "宿泊数":
+            starts.append(idx)
     return starts
 
 
 def find_period_for_section(
-    ws: Worksheet,
-    section_row: int,
+    rows: list[tuple],
+    section_idx: int,
     fallback: tuple[str, str, str],
 ) -> tuple[str, str, str]:
-    for row in range(section_row - 1, max(section_row - 20, 0), -1):
-        for col in range(1, 7):
-            text = normalize_text(ws.cell(row=row, column=col).value)
+    for idx in range(section_idx - 1, max(section_idx - 20, -1), -1):
+        for value in rows[idx][:T06_SCAN_MAX_COL]:
+            text = normalize_text(value)
             if not text:
                 continue
             parsed = parse_period_from_text(text)
@@ -245,53 +516,65 @@ def extract_t06_rows(
 ) -> pd.DataFrame:
     if "T06" not in workbook.sheetnames:
         raise ValueError("Sheet T06 not found.")
-    ws = workbook["T06"]
+    # セル単位のアクセスは read_only で毎回シートを再走査するため、T06 は1回の iter_rows で読む。
+    rows = read_sheet_rows(workbook["T06"], T06_SCAN_MAX_COL)
 
-    section_rows = find_t06_section_rows(ws)
+    section_rows = find_t06_section_rows(rows)
     if not section_rows:
         raise ValueError("Section key '宿泊数' was not found in T06.")
 
-    records: list[dict] = []
+    # 行ごとの dict は作らず、列ごとのリストに積んでから DataFrame にする。
+    period_types: list[str] = []
+    period_keys: list[str] = []
+    period_labels: list[str] = []
+    segments: list[str] = []
+    nights_bins: list[str] = []
+    values: list[float] = []
     for section_row in section_rows:
         period_type, period_key, period_label = find_period_for_section(
-            ws, section_row, title_period_fallback
+            rows, section_row, title_period_fallback
         )
 
-        for offset in range(1, 9):
-            row = section_row + offset
-            nights_bin = normalize_nights_bin(ws.cell(row=row, column=1).value)
+        for row in rows[section_row + 1 : section_row + 9]:
+            nights_bin = normalize_nights_bin(row[0])
             if nights_bin is None:
                 continue
 
             for segment, col in TARGET_SEGMENTS:
-                value = to_float(ws.cell(row=row, column=col).value)
+                value = to_float(row[col - 1])
                 if value is None:
                     continue
-                records.append(
-                    {
-                        "period_type": period_type,
-                        "period_key": period_key,
-                        "period_label": period_label,
-                        "release_type": release_type,
-                        "segment": segment,
-                        "nights_bin": nights_bin,
-                        "value": value,
-                        "source_url": source_url,
-                        "source_title": source_title,
-                        "source_sha256": source_sha256,
-                    }
-                )
-
-    if not records:
+                period_types.append(period_type)
+                period_keys.append(period_key)
+                period_labels.append(period_label)
+                segments.append(segment)
+                nights_bins.append(nights_bin)
+                values.append(value)
+
+    if not values:
         raise ValueError("No rows parsed from T06 sections.")
 
-    df = pd.DataFrame(records)
+    df = pd.DataFrame(
+        {
+            "period_type": period_types,
+            "period_key": period_keys,
+            "period_label": period_labels,
+            "release_type": release_type,
+            "segment": segments,
+            "nights_bin": nights_bins,
+            "value": values,
+            "source_url": source_url,
+            "source_title": source_title,
+            "source_sha256": source_sha256,
+        }
+    )
     return df
 
 
-def load_existing_tcd_rows(sqlite_path: Path) -> pd.DataFrame:
+def load_existing_tcd_columns(sqlite_path: Path) -> set[str]:
+    """既存テーブルの列名を返す。テーブルが無いか空の場合は空集合。"""
     if not sqlite_path.exists():
-        return pd.DataFrame()
+        return set()
 
     with sqlite3.connect(str(sqlite_path)) as conn:
         table_exists = conn.execute(
@@ -299,8 +582,20 @@ def load_existing_tcd_rows(sqlite_path: Path) -> pd.DataFrame:
             (TABLE_NAME,),
         ).fetchone()
         if not table_exists:
-            return pd.DataFrame()
-        return pd.read_sql_query(f"SELECT * FROM {TABLE_NAME}", conn)
+            return set()
+        if conn.execute(f"SELECT 1 FROM {TABLE_NAME} LIMIT 1").fetchone() is None:
+            return set()
+        return {str(row[1]) for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")}
+
+
+def load_existing_tcd_rows(sqlite_path: Path, source_url: str, source_sha256: str) -> pd.DataFrame:
+    # 全件は読まず、再利用するファイルの行だけを source インデックス経由で引く。
+    with sqlite3.connect(str(sqlite_path)) as conn:
+        return pd.read_sql_query(
+            f"SELECT * FROM {TABLE_NAME} WHERE source_url = ? AND source_sha256 = ?",
+            conn,
+            params=(source_url, source_sha256),
+        )
 
 
 def build_tcd_sqlite(df: pd.DataFrame, sqlite_path: Path) -> None:
@@ -322,11 +617,14 @@ def build_available_periods(df: pd.DataFrame) -> list[dict]:
     if df.empty:
         return []
 
+    # 期ごとの DataFrame は作らず、リリース種別のユニーク値だけを1回の groupby で集める。
+    release_values = df.groupby(["period_type", "period_key", "period_label"], dropna=False)[
+        "release_type"
+    ].unique()
     records: list[dict] = []
-    grouped = df.groupby(["period_type", "period_key", "period_label"], dropna=False)
-    for (period_type, period_key, period_label), g in grouped:
+    for (period_type, period_key, period_label), values in release_values.items():
         releases = sorted(
-            g["release_type"].dropna().astype(str).unique().tolist(),
+            dict.fromkeys(str(x) for x in values if not pd.isna(x)),
             key=lambda x: 0 if x == "確報" else 1,
         )
         records.append(
@@ -340,10 +638,10 @@ def build_available_periods(df: pd.DataFrame) -> list[dict]:
 
     def sort_key(item: dict) -> tuple[int, int]:
         key = item["period_key"]
-        m_quarter = re.fullmatch(r"(\d{4})Q([1-4])", key)
+        m_quarter = PERIOD_KEY_QUARTER_RE.fullmatch(key)
         if m_quarter:
             return int(m_quarter.group(1)), int(m_quarter.group(2))
-        m_annual = re.fullmatch(r"(\d{4})", key)
+        m_annual = PERIOD_KEY_ANNUAL_RE.fullmatch(key)
         if m_annual:
             return int(m_annual.group(1)), 0
         return 0, 0
@@ -351,6 +649,13 @@ def build_available_periods(df: pd.DataFrame) -> list[dict]:
     return sorted(records, key=sort_key, reverse=True)
 
 
+def nights_sort_key(col: pd.Series) -> pd.Series:
+    # 泊数のみ NIGHTS_BIN_ORDER 順で比較する（未知の表記は NaN として末尾に回る）。
+    if col.name == "nights_bin":
+        return col.astype(NIGHTS_BIN_DTYPE)
+    return col
+
+
 def empty_tcd_dataframe() -> pd.DataFrame:
     return pd.DataFrame(
         columns=[
@@ -371,171 +676,178 @@ def empty_tcd_dataframe() -> pd.DataFrame:
 def main() -> int:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    html = fetch_source_page(TCD_SOURCE_PAGE_URL)
-    links = extract_target_excel_links(html, TCD_SOURCE_PAGE_URL)
-
     old_meta = load_meta_tcd()
-    old_processed = {
-        str(x.get("url")): str(x.get("sha256"))
-        for x in old_meta.get("processed_files", [])
-        if x.get("url") and x.get("sha256")
-    }
-    old_titles = {
-        str(x.get("url")): str(x.get("title_a1"))
-        for x in old_meta.get("processed_files", [])
-        if x.get("url")
-    }
-    old_rows = load_existing_tcd_rows(SQLITE_PATH)
-
-    fetched_files: list[dict[str, str]] = []
-    with tempfile.TemporaryDirectory() as td:
-        for idx, link in enumerate(links):
-            url = link["url"]
-            local_path = Path(td) / f"tcd_{idx:03d}.xlsx"
-            download_file(url, local_path)
-            fetched_files.append(
-                {
-                    "url": url,
-                    "link_text": link["link_text"],
-                    "local_path": str(local_path),
-                    "sha256": sha256_file(local_path),
-                }
-            )
+    with build_session() as session:
+        links, source_page = load_source_links(session, old_meta)
 
-        current_processed = {x["url"]: x["sha256"] for x in fetched_files}
-        source_set_changed = set(current_processed.keys()) != set(old_processed.keys())
-        hash_changed = any(old_processed.get(url) != sha for url, sha in current_processed.items())
-        old_rows_available = not old_rows.empty
+        old_processed = {
+            str(x.get("url")): str(x.get("sha256"))
+            for x in old_meta.get("processed_files", [])
+            if x.get("url") and x.get("sha256")
+        }
+        old_titles = {
+            str(x.get("url")): str(x.get("title_a1"))
+            for x in old_meta.get("processed_files", [])
+            if x.get("url")
+        }
+        old_columns = load_existing_tcd_columns(SQLITE_PATH)
+        old_rows_available = bool(old_columns)
+        # 既存行が無い場合は全ファイルを解析し直すため、条件付き GET は使わない。
+        cached_files: dict[str, dict[str, str]] = {}
+        if old_rows_available:
+            cached_files = {
+                str(x["url"]): {
+                    "sha256": str(x["sha256"]),
+                    "etag": str(x.get("etag") or ""),
+                    "last_modified": str(x.get("last_modified") or ""),
+                }
+                for x in old_meta.get("processed_files", [])
+                if x.get("url") and x.get("sha256") and (x.get("etag") or x.get("last_modified"))
+            }
 
-        if not source_set_changed and not hash_changed and old_rows_available:
-            print("No change: source file hash set unchanged.")
-            return 0
+        with tempfile.TemporaryDirectory() as td:
+            fetched_files = download_links(links, Path(td), session, cached_files=cached_files)
 
-        rebuilt_parts: list[pd.DataFrame] = []
-        fetched_at = now_utc_iso()
-        processed_entries: list[dict] = []
-
-        has_reuse_columns = {"source_url", "source_sha256"}.issubset(old_rows.columns)
-        for item in fetched_files:
-            url = item["url"]
-            sha = item["sha256"]
-            link_text = item["link_text"]
-            local_path = Path(item["local_path"])
-            title_a1 = old_titles.get(url, "")
-
-            can_reuse = (
-                old_processed.get(url) == sha
-                and has_reuse_columns
-                and not old_rows.empty
+            current_processed = {x["url"]: x["sha256"] for x in fetched_files}
+            source_set_changed = set(current_processed.keys()) != set(old_processed.keys())
+            hash_changed = any(
+                old_processed.get(url) != sha for url, sha in current_processed.items()
             )
-            reused = pd.DataFrame()
-            if can_reuse:
-                reused = old_rows[
-                    (old_rows["source_url"] == url) & (old_rows["source_sha256"] == sha)
-                ].copy()
-
-            if not reused.empty:
-                title_a1 = normalize_text(reused["source_title"].iloc[0])
-                rebuilt_parts.append(reused)
-                processed_entries.append(
-                    {
-                        "url": url,
-                        "sha256": sha,
-                        "title_a1": title_a1,
-                        "fetched_at": fetched_at,
-                    }
-                )
-                print(f"Reused cached rows: {url}")
-                continue
 
-            try:
-                wb = load_workbook(local_path, read_only=False, data_only=True)
-                title_a1 = get_title_a1(wb)
-            except Exception as e:
-                processed_entries.append(
-                    {
-                        "url": url,
-                        "sha256": sha,
-                        "title_a1": title_a1,
-                        "fetched_at": fetched_at,
-                    }
-                )
-                print(f"Skipped (open failed): {url} ({e})")
-                continue
+            if not source_set_changed and not hash_changed and old_rows_available:
+                print("No change: source file hash set unchanged.")
+                return 0
+
+            rebuilt_parts: list[pd.DataFrame] = []
+            fetched_at = now_utc_iso()
+            processed_entries: list[dict] = []
+
+            has_reuse_columns = {"source_url", "source_sha256"}.issubset(old_columns)
+            for idx, item in enumerate(fetched_files):
+                url = item["url"]
+                sha = item["sha256"]
+                link_text = item["link_text"]
+                title_a1 = old_titles.get(url, "")
+
+                can_reuse = old_processed.get(url) == sha and has_reuse_columns
+                reused = pd.DataFrame()
+                if can_reuse:
+                    reused = load_existing_tcd_rows(SQLITE_PATH, url, sha)
+
+                if not reused.empty:
+                    title_a1 = normalize_text(reused["source_title"].iloc[0])
+                    rebuilt_parts.append(reused)
+                    processed_entries.append(build_processed_entry(item, title_a1, fetched_at))
+                    print(f"Reused cached rows: {url}")
+                    continue
 
-            processed_entries.append(
-                {
-                    "url": url,
-                    "sha256": sha,
-                    "title_a1": title_a1,
-                    "fetched_at": fetched_at,
-                }
-            )
+                if not item["local_path"]:
+                    # 304 だったが再利用できる行が無い（前回スキップ等）ため、本体を取り直す。
+                    refetch_path = Path(td) / f"tcd_{idx:03d}.xlsx"
+                    item = {
+                        **item,
+                        "local_path": str(refetch_path),
+                        **download_file(url, refetch_path, session=session),
+                    }
+                    sha = item["sha256"]
+                local_path = Path(item["local_path"])
+
+                # 表題で対象外と分かるファイルは、ブックを開く前に A1 だけ読んで弾く。
+                peeked_title = peek_title_a1(local_path)
+                if peeked_title is not None:
+                    try:
+                        parse_title_metadata(peeked_title, link_text)
+                    except ValueError as e:
+                        processed_entries.append(
+                            build_processed_entry(item, peeked_title, fetched_at)
+                        )
+                        print(f"Skipped (non-target/unsupported): {url} ({e})")
+                        continue
+
+                wb = None
+                try:
+                    wb = load_workbook(local_path, read_only=True, data_only=True)
+                    title_a1 = get_title_a1(wb)
+                except Exception as e:
+                    # 開けた後に表題の取得で失敗した場合も、zip のハンドルを残さない。
+                    if wb is not None:
+                        wb.close()
+                    processed_entries.append(build_processed_entry(item, title_a1, fetched_at))
+                    print(f"Skipped (open failed): {url} ({e})")
+                    continue
 
-            try:
-                period_type, period_key, period_label, release_type = parse_title_metadata(
-                    title_a1, link_text
-                )
-                parsed = extract_t06_rows(
-                    workbook=wb,
-                    source_url=url,
-                    source_title=title_a1,
-                    source_sha256=sha,
-                    title_period_fallback=(period_type, period_key, period_label),
-                    release_type=release_type,
+                processed_entries.append(build_processed_entry(item, title_a1, fetched_at))
+
+                try:
+                    period_type, period_key, period_label, release_type = parse_title_metadata(
+                        title_a1, link_text
+                    )
+                    parsed = extract_t06_rows(
+                        workbook=wb,
+                        source_url=url,
+                        source_title=title_a1,
+                        source_sha256=sha,
+                        title_period_fallback=(period_type, period_key, period_label),
+                        release_type=release_type,
+                    )
+                except Exception as e:
+                    print(f"Skipped (non-target/unsupported): {url} ({e})")
+                    continue
+                finally:
+                    # read_only のブックは zip を開いたままにするため明示的に閉じる。
+                    wb.close()
+
+                rebuilt_parts.append(parsed)
+                print(f"Parsed: {url}")
+
+            if rebuilt_parts:
+                new_df = pd.concat(rebuilt_parts, ignore_index=True)
+            else:
+                raise RuntimeError(
+                    "No parsable TCD files found after download. Check source page structure."
                 )
-            except Exception as e:
-                print(f"Skipped (non-target/unsupported): {url} ({e})")
-                continue
 
-            rebuilt_parts.append(parsed)
-            print(f"Parsed: {url}")
+            if not new_df.empty:
+                new_df["period_key"] = new_df["period_key"].astype(str)
+                new_df["nights_bin"] = new_df["nights_bin"].astype(str)
+                new_df["segment"] = new_df["segment"].astype(str)
+                new_df["release_type"] = new_df["release_type"].astype(str)
+                new_df["period_type"] = new_df["period_type"].astype(str)
+                new_df["value"] = pd.to_numeric(new_df["value"], errors="coerce").fillna(0.0)
+
+                new_df = new_df.sort_values(
+                    [
+                        "period_type",
+                        "period_key",
+                        "release_type",
+                        "nights_bin",
+                        "segment",
+                        "source_url",
+                    ],
+                    key=nights_sort_key,
+                )
+                new_df = new_df.reset_index(drop=True)
+
+            build_tcd_sqlite(new_df, SQLITE_PATH)
+
+            new_meta = {
+                "source_page_url": TCD_SOURCE_PAGE_URL,
+                "source_page_sha256": source_page["sha256"],
+                "source_page_etag": source_page["etag"],
+                "source_page_last_modified": source_page["last_modified"],
+                "cached_links": links,
+                "last_checked_at": fetched_at,
+                "processed_files": processed_entries,
+                "available_periods": build_available_periods(new_df),
+                "note": "最新（確報優先）は同一period_type内で最新period_keyを選び、同一期に確報と2次速報がある場合は確報を優先する。",
+            }
+            save_meta_tcd(new_meta)
 
-        if rebuilt_parts:
-            new_df = pd.concat(rebuilt_parts, ignore_index=True)
-        else:
-            raise RuntimeError(
-                "No parsable TCD files found after download. Check source page structure."
+            print(
+                f"Updated {TABLE_NAME}: rows={len(new_df)} files={len(processed_entries)} "
+                f"periods={len(new_meta['available_periods'])}"
             )
-
-        if not new_df.empty:
-            new_df["period_key"] = new_df["period_key"].astype(str)
-            new_df["nights_bin"] = new_df["nights_bin"].astype(str)
-            new_df["segment"] = new_df["segment"].astype(str)
-            new_df["release_type"] = new_df["release_type"].astype(str)
-            new_df["period_type"] = new_df["period_type"].astype(str)
-            new_df["value"] = pd.to_numeric(new_df["value"], errors="coerce").fillna(0.0)
-
-            nights_order = {label: i for i, label in enumerate(NIGHTS_BIN_ORDER)}
-            new_df["_nights_sort"] = new_df["nights_bin"].map(lambda x: nights_order.get(x, 999))
-            new_df = new_df.sort_values(
-                [
-                    "period_type",
-                    "period_key",
-                    "release_type",
-                    "_nights_sort",
-                    "segment",
-                    "source_url",
-                ]
-            ).drop(columns=["_nights_sort"])
-            new_df = new_df.reset_index(drop=True)
-
-        build_tcd_sqlite(new_df, SQLITE_PATH)
-
-        new_meta = {
-            "source_page_url": TCD_SOURCE_PAGE_URL,
-            "last_checked_at": fetched_at,
-            "processed_files": processed_entries,
-            "available_periods": build_available_periods(new_df),
-            "note": "最新（確報優先）は同一period_type内で最新period_keyを選び、同一期に確報と2次速報がある場合は確報を優先する。",
-        }
-        save_meta_tcd(new_meta)
-
-        print(
-            f"Updated {TABLE_NAME}: rows={len(new_df)} files={len(processed_entries)} "
-            f"periods={len(new_meta['available_periods'])}"
-        )
-        return 0
+            return 0
 
 
 if __name__ == "__main__":
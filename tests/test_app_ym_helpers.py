@@ -0,0 +1,126 @@
+import pandas as pd
+
+from app import (
+    STAY_METRIC_COLUMNS,
+    add_year_month_columns,
+    apply_rolling_12m,
+    clamp_ym_code_to_available_range,
+    compact_scope_dataframe,
+    slice_ym_code_range,
+)
+
+
+def _scope_frame(yms: list[str], totals: list[float | None]) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "ym": yms,
+            "pref_code": "13",
+            "pref_name": "東京都",
+            "foreign": [None if t is None else t // 4 for t in totals],
+            "jp": [None if t is None else t - t // 4 for t in totals],
+            "total": totals,
+        }
+    )
+    return add_year_month_columns(compact_scope_dataframe(df))
+
+
+def _month_range(start: str, periods: int) -> list[str]:
+    return pd.period_range(start, periods=periods, freq="M").strftime("%Y-%m").tolist()
+
+
+def _rolling_reference(df: pd.DataFrame) -> pd.DataFrame:
+    # 置き換え前の実装（12行の rolling 合計、欠損を含む窓は除外）。
+    work = df.sort_values("ym").copy()
+    for col in STAY_METRIC_COLUMNS:
+        work[col] = work[col].rolling(window=12, min_periods=12).sum()
+    work = work.dropna(subset=STAY_METRIC_COLUMNS).copy()
+    for col in STAY_METRIC_COLUMNS:
+        work[col] = work[col].round().astype("int64")
+    return work.reset_index(drop=True)
+
+
+def test_apply_rolling_12m_matches_rolling_sum() -> None:
+    yms = _month_range("2023-01", 15)
+    df = _scope_frame(yms, [float(1000 + i * 7) for i in range(15)])
+
+    out = apply_rolling_12m(df)
+    expected = _rolling_reference(df)
+
+    assert out["ym"].tolist() == yms[11:]
+    assert out["total"].tolist() == [
+        sum(1000 + i * 7 for i in range(start, start + 12)) for start in range(4)
+    ]
+    for col in STAY_METRIC_COLUMNS:
+        assert out[col].tolist() == expected[col].tolist()
+
+
+def test_apply_rolling_12m_window_counts_rows_across_month_gaps() -> None:
+    # 欠けた月は詰めて12行で合計する（暦月ではなく行数の窓）。
+    yms = _month_range("2022-01", 16)
+    yms = yms[:5] + yms[7:]
+    df = _scope_frame(yms[::-1], [float(10 * (i + 1)) for i in range(len(yms))])
+
+    out = apply_rolling_12m(df)
+    expected = _rolling_reference(df)
+
+    assert out["ym"].tolist() == expected["ym"].tolist() == yms[11:]
+    for col in STAY_METRIC_COLUMNS:
+        assert out[col].tolist() == expected[col].tolist()
+
+
+def test_apply_rolling_12m_drops_windows_with_missing_values() -> None:
+    yms = _month_range("2023-01", 26)
+    totals: list[float | None] = [float(100 + i) for i in range(26)]
+    totals[3] = None
+    df = _scope_frame(yms, totals)
+
+    out = apply_rolling_12m(df)
+    expected = _rolling_reference(df)
+
+    # 4行目の欠損を含む窓（終端 2023-12〜2024-03）は出力しない。
+    assert out["ym"].tolist() == expected["ym"].tolist() == yms[15:]
+    for col in STAY_METRIC_COLUMNS:
+        assert out[col].tolist() == expected[col].tolist()
+
+
+def test_apply_rolling_12m_returns_empty_for_short_history() -> None:
+    df = _scope_frame(_month_range("2024-01", 11), [float(i) for i in range(11)])
+
+    out = apply_rolling_12m(df)
+
+    assert out.empty
+    assert out.columns.tolist() == df.columns.tolist()
+    assert apply_rolling_12m(df.iloc[0:0]).empty
+
+
+def test_slice_ym_code_range_includes_both_ends() -> None:
+    yms = _month_range("2023-11", 6)
+    df = _scope_frame(yms, [float(i) for i in range(6)])
+
+    assert slice_ym_code_range(df, 202312, 202402)["ym"].tolist() == [
+        "2023-12",
+        "2024-01",
+        "2024-02",
+    ]
+    assert slice_ym_code_range(df, 202401, 202401)["ym"].tolist() == ["2024-01"]
+
+
+def test_slice_ym_code_range_with_gaps_and_out_of_range_bounds() -> None:
+    yms = ["2023-01", "2023-02", "2023-06", "2023-07"]
+    df = _scope_frame(yms, [1.0, 2.0, 3.0, 4.0])
+
+    # 端が欠けた月でも、その間にある行だけを返す。
+    assert slice_ym_code_range(df, 202303, 202306)["ym"].tolist() == ["2023-06"]
+    assert slice_ym_code_range(df, 202303, 202305).empty
+    # データ範囲の外は切り詰め、範囲外だけなら空にする。
+    assert slice_ym_code_range(df, 202001, 203012)["ym"].tolist() == yms
+    assert slice_ym_code_range(df, 201901, 201912).empty
+    assert slice_ym_code_range(df, 202401, 202412).empty
+    assert slice_ym_code_range(df, 202307, 202301).empty
+
+
+def test_clamp_ym_code_to_available_range() -> None:
+    assert clamp_ym_code_to_available_range(202306, 202001, 202512) == (202306, False)
+    assert clamp_ym_code_to_available_range(202001, 202001, 202512) == (202001, False)
+    assert clamp_ym_code_to_available_range(201912, 202001, 202512) == (202001, True)
+    assert clamp_ym_code_to_available_range(202601, 202001, 202512) == (202512, True)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from scripts.parse_ts_table import build_raw_from_three_sheets
+
+
+def _write_monthly_sheet(wb: Workbook, title: str, base: int) -> None:
+    ws = wb.create_sheet(title)
+    ws.cell(1, 1, "推移表")
+    ws.cell(2, 2, "令和6年")
+    ws.merge_cells(start_row=2, start_column=2, end_row=2, end_column=3)
+    ws.cell(2, 4, "令和7年")
+    for offset, month in enumerate(["11月", "12月", "1月"]):
+        ws.cell(3, 2 + offset, month)
+    ws.cell(4, 1, "全　国")
+    ws.cell(5, 1, "01 北海道")
+    ws.cell(6, 1, "13東京都")
+    for row in (4, 5, 6):
+        ws.cell(row, 2, base + row)
+        ws.cell(row, 3, "-")
+        ws.cell(row, 4, float(base * 2 + row))
+    ws.cell(6, 3, None)
+    ws.cell(8, 1, "注：速報値")
+
+
+def test_build_raw_from_three_sheets_same_in_read_only_mode(tmp_path: Path) -> None:
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, base in (("1-2", 100), ("2-2", 10), ("3-2", 1)):
+        _write_monthly_sheet(wb, title, base)
+    path = tmp_path / "ts_table.xlsx"
+    wb.save(path)
+
+    results = []
+    for read_only in (False, True):
+        book = load_workbook(path, read_only=read_only, data_only=True)
+        try:
+            results.append(
+                build_raw_from_three_sheets(book["1-2"], book["2-2"], book["3-2"])
+            )
+        finally:
+            book.close()
+
+    normal, streamed = results
+    assert normal.equals(streamed)
+    assert normal["ym"].tolist() == [
+        "2024-11",
+        "2024-11",
+        "2024-11",
+        "2025-01",
+        "2025-01",
+        "2025-01",
+    ]
+    assert normal["pref_code"].tolist() == ["00", "01", "13"] * 2
+    tokyo = normal[(normal["ym"] == "2025-01") & (normal["pref_code"] == "13")]
+    assert tokyo[["total", "jp", "foreign"]].iloc[0].tolist() == [206.0, 26.0, 8.0]
+    national = normal[(normal["ym"] == "2024-11") & (normal["pref_code"] == "00")]
+    assert national["total"].iloc[0] == 105.0 + 106.0
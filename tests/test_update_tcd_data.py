@@ -0,0 +1,174 @@
+import hashlib
+import sys
+import zipfile
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.update_tcd_data import (
+    download_file,
+    extract_t06_rows,
+    get_title_a1,
+    parse_title_metadata,
+    peek_title_a1,
+)
+
+
+def _write_tcd_workbook(path: Path) -> None:
+    wb = Workbook()
+    title_ws = wb.active
+    title_ws.title = "表題"
+    title_ws["A1"] = "旅行・観光消費動向調査　2026年1～3月期（２次速報）　集計事項一覧"
+
+    ws = wb.create_sheet("T06")
+    ws.cell(1, 1, "T06 宿泊数別")
+    ws.cell(3, 3, "2025年1～3月期")
+    ws.cell(5, 1, "宿 泊 数")
+    for offset, label in enumerate(["1泊", "2 泊", "8泊以上"], start=1):
+        ws.cell(5 + offset, 1, label)
+        ws.cell(5 + offset, 2, f"{offset * 1000:,}")
+        ws.cell(5 + offset, 5, None if offset == 2 else offset)
+    ws.cell(30, 1, "宿泊数")
+    ws.cell(31, 1, "1泊")
+    ws.cell(31, 2, 5.5)
+    wb.save(path)
+
+
+def test_extract_t06_rows_same_in_read_only_mode(tmp_path: Path) -> None:
+    path = tmp_path / "tcd.xlsx"
+    _write_tcd_workbook(path)
+
+    results = []
+    for read_only in (False, True):
+        wb = load_workbook(path, read_only=read_only, data_only=True)
+        try:
+            title_a1 = get_title_a1(wb)
+            period_type, period_key, period_label, release_type = parse_title_metadata(
+                title_a1, ""
+            )
+            results.append(
+                extract_t06_rows(
+                    workbook=wb,
+                    source_url="https://example.com/tcd.xlsx",
+                    source_title=title_a1,
+                    source_sha256="sha",
+                    title_period_fallback=(period_type, period_key, period_label),
+                    release_type=release_type,
+                )
+            )
+        finally:
+            wb.close()
+
+    normal, streamed = results
+    assert normal.equals(streamed)
+    assert normal["period_key"].tolist() == ["2025Q1"] * 5 + ["2026Q1"]
+    assert normal["release_type"].unique().tolist() == ["2次速報"]
+    assert normal["nights_bin"].tolist() == ["1泊", "1泊", "2泊", "8泊以上", "8泊以上", "1泊"]
+    assert normal["segment"].tolist() == [
+        "domestic_total",
+        "domestic_business",
+        "domestic_total",
+        "domestic_total",
+        "domestic_business",
+        "domestic_total",
+    ]
+    assert normal["value"].tolist() == [1000.0, 1.0, 2000.0, 3000.0, 3.0, 5.5]
+
+
+def test_peek_title_a1_reads_shared_string_without_phonetic(tmp_path: Path) -> None:
+    main_ns = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    rel_ns = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    path = tmp_path / "tcd.xlsx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{main_ns}" xmlns:r="{rel_ns}"><sheets>'
+            '<sheet name="T06" sheetId="1" r:id="rId1"/>'
+            '<sheet name="表題" sheetId="2" r:id="rId2"/>'
+            "</sheets></workbook>",
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/>'
+            '<Relationship Id="rId2" Target="worksheets/sheet2.xml"/>'
+            "</Relationships>",
+        )
+        zf.writestr(
+            "xl/worksheets/sheet2.xml",
+            f'<worksheet xmlns="{main_ns}"><sheetData><row r="1">'
+            '<c r="A1" t="s"><v>1</v></c></row></sheetData></worksheet>',
+        )
+        zf.writestr(
+            "xl/sharedStrings.xml",
+            f'<sst xmlns="{main_ns}"><si><t>宿泊数</t></si>'
+            "<si><r><t>旅行・観光消費動向調査　2025年</t></r><r><t>（確報）</t></r>"
+            "<rPh><t>リョコウ</t></rPh></si></sst>",
+        )
+
+    assert peek_title_a1(path) == "旅行・観光消費動向調査　2025年（確報）"
+
+
+def test_peek_title_a1_matches_openpyxl_title(tmp_path: Path) -> None:
+    path = tmp_path / "tcd.xlsx"
+    _write_tcd_workbook(path)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        expected = get_title_a1(wb)
+    finally:
+        wb.close()
+
+    assert peek_title_a1(path) == expected
+    assert peek_title_a1(tmp_path / "missing.xlsx") is None
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, body: bytes, headers: dict[str, str]) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+
+    def __enter__(self) -> "_FakeResponse":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def iter_content(self, chunk_size: int) -> list[bytes]:
+        return [self.body[i : i + chunk_size] for i in range(0, len(self.body), chunk_size)]
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.sent_headers: list[dict[str, str]] = []
+
+    def get(self, url: str, headers: dict[str, str], **kwargs: object) -> _FakeResponse:
+        self.sent_headers.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return _FakeResponse(304, b"", {"ETag": '"v1"'})
+        return _FakeResponse(200, b"xlsx-bytes", {"ETag": '"v1"'})
+
+
+def test_download_file_skips_body_on_not_modified(tmp_path: Path) -> None:
+    session = _FakeSession()
+    first = download_file("https://example.com/a.xlsx", tmp_path / "a.xlsx", session=session)
+
+    assert first == {
+        "sha256": hashlib.sha256(b"xlsx-bytes").hexdigest(),
+        "etag": '"v1"',
+        "last_modified": "",
+    }
+    assert (tmp_path / "a.xlsx").read_bytes() == b"xlsx-bytes"
+
+    second = download_file(
+        "https://example.com/a.xlsx", tmp_path / "b.xlsx", session=session, cached=first
+    )
+
+    assert second is None
+    assert not (tmp_path / "b.xlsx").exists()
+    assert session.sent_headers == [{}, {"If-None-Match": '"v1"'}]